@@ -0,0 +1,248 @@
+"""Benchmark the parser and analyzer on synthetic Instagram exports.
+
+Generates deterministic message_N.json files, times each stage (parse,
+decode, stats, word index, longest, sort, the fused aggregate pass, the
+timeline analytics and deduplicating a fully overlapping second export) at
+several sizes and reports throughput and peak memory. Results can be saved
+as a baseline and later runs compared against it to flag regressions:
+
+    python benchmark.py --sizes 10000,100000 --save-baseline
+    python benchmark.py --sizes 10000,100000 --compare
+"""
+import argparse
+import gc
+import json
+import os
+import random
+import shutil
+import sys
+import tempfile
+import time
+import tracemalloc
+
+from instagram_message_parser import (MessageAnalyzer, decode_contents, deduplicate_streams,
+                                      parse_instagram_json)
+from timeline import analyze_timeline
+
+DEFAULT_SIZES = [10_000, 100_000, 1_000_000, 5_000_000]
+DEFAULT_BASELINE = "benchmark_baseline.json"
+
+_WORDS = ("the and you that have for not with this but what just like get know "
+          "good time really think going yeah okay tomorrow tonight weekend dinner "
+          "movie coffee morning sorry thanks love haha lol omg message picture "
+          "remember maybe probably actually already").split()
+# Non-ASCII phrases; exports store these as UTF-8 bytes escaped as latin1
+_NON_ASCII = ["café", "naïve", "über", "😂😂", "❤️", "👍", "🔥🔥🔥", "привет", "日本語", "ça va?"]
+_STOCK_PHRASES = ["ok", "lol", "Haha", "Good night!", "https://www.instagram.com/p/abc123/"]
+_REACTIONS = ["Liked a message", "Reacted 😂 to your message", "Liked a message"]
+_MEDIA_KEYS = ["photos", "videos", "gifs", "files", "audio_files", "share"]
+
+def _mojibake(text):
+    """Encode text the way Instagram exports do (UTF-8 bytes read as latin1)."""
+    return text.encode('utf-8').decode('latin1')
+
+def generate_export(directory, messages, participants=2, media_ratio=0.1,
+                    reaction_ratio=0.05, mojibake_ratio=0.3, files=1, seed=0):
+    """Write a synthetic conversation as message_1.json ... message_N.json.
+
+    Messages are newest-first across and within files like a real export.
+    Returns the list of written paths.
+    """
+    rng = random.Random(seed)
+    names = [f"Participant {i + 1}" for i in range(participants)]
+    os.makedirs(directory, exist_ok=True)
+    timestamp = 1_700_000_000_000
+    per_file = -(-messages // files) if files else messages
+    paths = []
+    for file_index in range(files):
+        count = min(per_file, messages - file_index * per_file)
+        if count <= 0:
+            break
+        records = []
+        for _ in range(count):
+            timestamp -= rng.randint(1_000, 3_600_000)
+            record = {"sender_name": _mojibake(rng.choice(names)), "timestamp_ms": timestamp}
+            roll = rng.random()
+            if roll < media_ratio:
+                key = rng.choice(_MEDIA_KEYS)
+                record[key] = ({"link": f"https://example.com/{rng.randint(0, 10**6)}"}
+                               if key == "share" else [{"uri": "media/file", "creation_timestamp": timestamp // 1000}])
+            elif roll < media_ratio + reaction_ratio:
+                record["content"] = _mojibake(rng.choice(_REACTIONS))
+            elif rng.random() < 0.1:
+                record["content"] = rng.choice(_STOCK_PHRASES)
+            else:
+                words = [rng.choice(_WORDS) for _ in range(rng.randint(1, 25))]
+                if rng.random() < mojibake_ratio:
+                    words.insert(rng.randint(0, len(words)), rng.choice(_NON_ASCII))
+                record["content"] = _mojibake(" ".join(words))
+            records.append(record)
+        data = {
+            "participants": [{"name": _mojibake(name)} for name in names],
+            "messages": records,
+            "title": "Synthetic conversation",
+            "is_still_participant": True,
+            "thread_path": "inbox/synthetic_0"
+        }
+        path = os.path.join(directory, f"message_{file_index + 1}.json")
+        with open(path, 'w', encoding='utf-8') as file:
+            json.dump(data, file)
+        paths.append(path)
+    return paths
+
+def _raw_contents(paths):
+    contents = []
+    for path in paths:
+        with open(path, 'r', encoding='utf-8') as file:
+            contents.extend(m["content"] for m in json.load(file)["messages"] if "content" in m)
+    return contents
+
+def _stages(paths):
+    """Return (name, setup, run) for each benchmarked stage.
+
+    setup() builds the stage's input outside the timed region; run(input)
+    returns the number of items processed.
+    """
+    def parse(_):
+        return sum(len(parse_instagram_json(path)["messages"]) for path in paths)
+
+    def decode(contents):
+        decode_contents(contents)
+        return len(contents)
+
+    def load_messages():
+        messages = []
+        for path in paths:
+            messages.extend(parse_instagram_json(path)["messages"])
+        return messages
+
+    def newest_first():
+        return MessageAnalyzer.sort_by_timestamp(load_messages())
+
+    def counted(function):
+        def run(messages):
+            function(messages)
+            return len(messages)
+        return run
+
+    return [
+        ("parse", lambda: None, parse),
+        ("decode", lambda: _raw_contents(paths), decode),
+        ("stats", load_messages, counted(MessageAnalyzer.calculate_stats)),
+        ("word_index", load_messages, counted(MessageAnalyzer.build_word_index)),
+        ("longest", load_messages, counted(lambda m: MessageAnalyzer.find_longest_messages(m, 20))),
+        ("sort", load_messages, counted(MessageAnalyzer.sort_by_timestamp)),
+        ("aggregate", load_messages, counted(MessageAnalyzer.aggregate)),
+        ("timeline", load_messages, counted(analyze_timeline)),
+        # Worst case: a second export holding every message again
+        ("deduplicate", newest_first, counted(lambda m: deduplicate_streams([m, m]))),
+    ]
+
+def run_benchmarks(sizes, repeat=3, files=4, participants=2, measure_memory=True,
+                   seed=0, log=sys.stderr):
+    """Generate an export per size and time every stage on it.
+
+    Returns {size: {stage: {"seconds", "items_per_second", "peak_bytes"}}},
+    keeping the fastest of `repeat` runs.
+    """
+    results = {}
+    for size in sizes:
+        directory = tempfile.mkdtemp(prefix="ig_bench_")
+        try:
+            print(f"Generating {size} messages...", file=log)
+            paths = generate_export(directory, size, participants=participants,
+                                    files=files, seed=seed)
+            results[str(size)] = size_results = {}
+            for name, setup, run in _stages(paths):
+                data = setup()
+                best, items = None, 0
+                for _ in range(repeat):
+                    gc.collect()
+                    start = time.perf_counter()
+                    items = run(data)
+                    elapsed = time.perf_counter() - start
+                    best = elapsed if best is None else min(best, elapsed)
+                peak = None
+                if measure_memory:
+                    # A separate run, since tracing slows everything down
+                    gc.collect()
+                    tracemalloc.start()
+                    run(data)
+                    peak = tracemalloc.get_traced_memory()[1]
+                    tracemalloc.stop()
+                del data
+                size_results[name] = {
+                    "seconds": best,
+                    "items_per_second": items / best if best else None,
+                    "peak_bytes": peak
+                }
+                print(f"  {name}: {best:.3f}s", file=log)
+        finally:
+            shutil.rmtree(directory, ignore_errors=True)
+    return results
+
+def compare(results, baseline, threshold):
+    """Return a description of every stage that regressed by more than `threshold`."""
+    regressions = []
+    for size, stages in results.items():
+        for stage, current in stages.items():
+            previous = baseline.get(size, {}).get(stage)
+            if not previous:
+                continue
+            if previous["seconds"] and current["seconds"] > previous["seconds"] * (1 + threshold):
+                regressions.append(f"{stage} @ {size}: {previous['seconds']:.3f}s -> {current['seconds']:.3f}s")
+            if (previous.get("peak_bytes") and current.get("peak_bytes")
+                    and current["peak_bytes"] > previous["peak_bytes"] * (1 + threshold)):
+                regressions.append(f"{stage} @ {size}: peak {previous['peak_bytes']} -> {current['peak_bytes']} bytes")
+    return regressions
+
+def format_table(results):
+    lines = [f"{'size':>10} {'stage':<12} {'seconds':>10} {'items/s':>14} {'peak MiB':>10}"]
+    for size, stages in results.items():
+        for stage, r in stages.items():
+            rate = f"{r['items_per_second']:,.0f}" if r["items_per_second"] else "-"
+            peak = f"{r['peak_bytes'] / 2**20:.1f}" if r["peak_bytes"] is not None else "-"
+            lines.append(f"{size:>10} {stage:<12} {r['seconds']:>10.3f} {rate:>14} {peak:>10}")
+    return "\n".join(lines)
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument("--sizes", default=",".join(str(s) for s in DEFAULT_SIZES),
+                        help="comma-separated message counts (default: 10k to 5M)")
+    parser.add_argument("--files", type=int, default=4, help="files per export (default: 4)")
+    parser.add_argument("--participants", type=int, default=2)
+    parser.add_argument("--repeat", type=int, default=3, help="runs per stage; the fastest is kept")
+    parser.add_argument("--no-memory", action="store_true", help="skip the peak memory runs")
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="baseline file path")
+    parser.add_argument("--save-baseline", action="store_true", help="store these results as the baseline")
+    parser.add_argument("--compare", action="store_true", help="flag regressions against the baseline")
+    parser.add_argument("--threshold", type=float, default=0.2,
+                        help="allowed slowdown/memory growth before flagging (default: 0.2)")
+    parser.add_argument("--json", action="store_true", help="print results as JSON")
+    args = parser.parse_args(argv)
+
+    sizes = [int(s) for s in args.sizes.split(",") if s]
+    results = run_benchmarks(sizes, args.repeat, args.files, args.participants,
+                             not args.no_memory, args.seed)
+    print(json.dumps(results, indent=2) if args.json else format_table(results))
+
+    status = 0
+    if args.compare:
+        try:
+            with open(args.baseline, 'r', encoding='utf-8') as file:
+                baseline = json.load(file)
+        except OSError as exc:
+            print(f"Could not read baseline {args.baseline}: {exc}", file=sys.stderr)
+            return 2
+        regressions = compare(results, baseline, args.threshold)
+        for regression in regressions:
+            print(f"REGRESSION: {regression}")
+        status = 1 if regressions else 0
+    if args.save_baseline:
+        with open(args.baseline, 'w', encoding='utf-8') as file:
+            json.dump(results, file, indent=2)
+    return status
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,79 @@
+import tkinter as tk
+from tkinter import ttk
+from datetime import datetime
+
+class ConversationCatalog(tk.Toplevel):
+    """Window listing every conversation of an export, opened on double-click.
+
+    Entries come from export_catalog.build_catalog, so nothing is parsed until
+    a conversation is opened with on_open(entry).
+    """
+
+    COLUMNS = (("title", "Conversation", 260), ("participants", "Participants", 260),
+               ("messages", "Messages", 80), ("first", "From", 90),
+               ("last", "To", 90), ("size", "Size", 80))
+
+    def __init__(self, master, root_path, entries, on_open):
+        super().__init__(master)
+        self.title(f"Conversations in {root_path}")
+        self.geometry("1000x600")
+        self.entries = entries
+        self.on_open = on_open
+
+        filter_frame = ttk.Frame(self, padding=5)
+        filter_frame.pack(fill=tk.X)
+        ttk.Label(filter_frame, text="Filter:").pack(side=tk.LEFT, padx=5)
+        self.filter_entry = ttk.Entry(filter_frame, width=40)
+        self.filter_entry.pack(side=tk.LEFT, padx=5)
+        self.filter_entry.bind("<KeyRelease>", lambda event: self.refresh())
+        self.count_label = ttk.Label(filter_frame, text="")
+        self.count_label.pack(side=tk.RIGHT, padx=5)
+
+        self.scrollbar = ttk.Scrollbar(self)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.tree = ttk.Treeview(self, columns=[c[0] for c in self.COLUMNS], show="headings",
+                                 yscrollcommand=self.scrollbar.set)
+        for column, heading, width in self.COLUMNS:
+            self.tree.heading(column, text=heading)
+            self.tree.column(column, width=width, anchor=tk.W if column in ("title", "participants") else tk.E)
+        self.tree.pack(fill=tk.BOTH, expand=True)
+        self.scrollbar.config(command=self.tree.yview)
+        self.tree.bind("<Double-1>", self._open_selected)
+        self.tree.bind("<Return>", self._open_selected)
+        self.refresh()
+
+    @staticmethod
+    def _format_day(timestamp_ms):
+        if timestamp_ms is None:
+            return ""
+        return datetime.fromtimestamp(timestamp_ms / 1000).strftime('%Y-%m-%d')
+
+    @staticmethod
+    def _format_size(size):
+        for unit in ("B", "KB", "MB"):
+            if size < 1024:
+                return f"{size:.0f} {unit}"
+            size /= 1024
+        return f"{size:.1f} GB"
+
+    def refresh(self):
+        """Show the entries whose title or participants contain the filter text."""
+        text = self.filter_entry.get().strip().lower()
+        self.tree.delete(*self.tree.get_children())
+        shown = 0
+        for i, entry in enumerate(self.entries):
+            participants = ", ".join(entry["participants"])
+            if text and text not in entry["title"].lower() and text not in participants.lower():
+                continue
+            self.tree.insert("", tk.END, iid=str(i), values=(
+                entry["title"], participants, entry["messages"],
+                self._format_day(entry["first_timestamp"]),
+                self._format_day(entry["last_timestamp"]),
+                self._format_size(entry["size"])))
+            shown += 1
+        self.count_label.config(text=f"{shown} of {len(self.entries)} conversations")
+
+    def _open_selected(self, event=None):
+        selection = self.tree.selection()
+        if selection:
+            self.on_open(self.entries[int(selection[0])])
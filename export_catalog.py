@@ -0,0 +1,150 @@
+import json
+import mmap
+import os
+import re
+import sys
+
+from instagram_message_parser import decode_content, iter_instagram_json, _conversation_files
+
+# Where the inbox sits below the root of an export, newest layout first
+INBOX_LOCATIONS = [
+    os.path.join("your_instagram_activity", "messages", "inbox"),
+    os.path.join("messages", "inbox"),
+    "inbox",
+]
+
+# Escaped quotes inside message text can't match these, so they only hit keys
+_TIMESTAMP_RE = re.compile(rb'"timestamp_ms"\s*:\s*(\d+)')
+_TITLE_RE = re.compile(rb'"title"\s*:\s*"((?:[^"\\]|\\.)*)"')
+_TITLE_TAIL_BYTES = 64 * 1024
+
+def find_inbox(root):
+    """Return the inbox directory of an export root, or None if there is none.
+
+    The root may also be the inbox itself.
+    """
+    for location in INBOX_LOCATIONS:
+        inbox = os.path.join(root, location)
+        if os.path.isdir(inbox):
+            return inbox
+    if os.path.basename(os.path.normpath(root)) == "inbox":
+        return root
+    return None
+
+def find_export_conversations(root):
+    """Return (name, [message_N.json files]) for every conversation in an export."""
+    inbox = find_inbox(root)
+    if inbox is None:
+        return []
+    conversations = []
+    for name in sorted(os.listdir(inbox)):
+        directory = os.path.join(inbox, name)
+        if os.path.isdir(directory):
+            files = _conversation_files(directory)
+            if files:
+                conversations.append((name, files))
+    return conversations
+
+def _scan_file(file_path):
+    """Return (size, message count, oldest, newest, title) without parsing messages."""
+    size = os.path.getsize(file_path)
+    if not size:
+        return 0, 0, None, None, None
+    with open(file_path, 'rb') as file, mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+        count, oldest, newest = 0, None, None
+        for match in _TIMESTAMP_RE.finditer(data):
+            timestamp = int(match.group(1))
+            count += 1
+            if oldest is None or timestamp < oldest:
+                oldest = timestamp
+            if newest is None or timestamp > newest:
+                newest = timestamp
+        # The thread title follows the messages array
+        title = None
+        for match in _TITLE_RE.finditer(data, max(0, size - _TITLE_TAIL_BYTES)):
+            title = match.group(1)
+    if title is not None:
+        title = decode_content(json.loads(b'"' + title + b'"'))
+    return size, count, oldest, newest, title
+
+def _head_participants(file_path):
+    """Read the participants list from the start of a file, stopping at the messages."""
+    for kind, value in iter_instagram_json(file_path):
+        if kind == "participants":
+            return [decode_content(name) for name in value]
+        # Participants after the messages array aren't worth streaming for
+        break
+    return []
+
+def catalog_conversation(name, file_paths):
+    """Summarize one conversation without loading its messages.
+
+    The message count is the number of raw records, before the reaction and
+    like filtering the parser applies, so it is an upper bound.
+
+    Returns:
+        Dictionary with the conversation "name", "title", "participants",
+        "files", total "size" in bytes, "messages" and the
+        "first_timestamp"/"last_timestamp" range (None when empty)
+    """
+    entry = {
+        "name": name,
+        "title": None,
+        "participants": [],
+        "files": list(file_paths),
+        "size": 0,
+        "messages": 0,
+        "first_timestamp": None,
+        "last_timestamp": None
+    }
+    for file_path in file_paths:
+        try:
+            size, count, oldest, newest, title = _scan_file(file_path)
+            if not entry["participants"]:
+                entry["participants"] = _head_participants(file_path)
+        except Exception as exc:
+            print(f"Error reading file {file_path}: {exc}", file=sys.stderr)
+            continue
+        entry["size"] += size
+        entry["messages"] += count
+        if entry["title"] is None:
+            entry["title"] = title
+        if oldest is not None and (entry["first_timestamp"] is None or oldest < entry["first_timestamp"]):
+            entry["first_timestamp"] = oldest
+        if newest is not None and (entry["last_timestamp"] is None or newest > entry["last_timestamp"]):
+            entry["last_timestamp"] = newest
+    if entry["title"] is None:
+        entry["title"] = ", ".join(entry["participants"]) or name
+    return entry
+
+def _catalog_pair(conversation):
+    """catalog_conversation for a pool worker, taking a (name, files) pair."""
+    return catalog_conversation(*conversation)
+
+def build_catalog(root, max_workers=None, progress=None):
+    """Catalog every conversation of an export, scanning them in parallel.
+
+    progress(entry, done, total) is called as each conversation finishes; an
+    exception raised from it stops the scan like in parse_files.
+
+    Returns:
+        List of catalog_conversation entries, most recently active first
+    """
+    conversations = find_export_conversations(root)
+    entries = []
+    # A pool with a single worker only adds the cost of pickling the entries back
+    if (max_workers or os.cpu_count() or 1) == 1 or len(conversations) <= 1:
+        for name, files in conversations:
+            entries.append(catalog_conversation(name, files))
+            if progress is not None:
+                progress(entries[-1], len(entries), len(conversations))
+    else:
+        import multiprocessing
+        # Leaving the block terminates the workers, like in parse_files
+        with multiprocessing.Pool(max_workers) as pool:
+            for entry in pool.imap_unordered(_catalog_pair, conversations):
+                entries.append(entry)
+                if progress is not None:
+                    progress(entry, len(entries), len(conversations))
+    entries.sort(key=lambda entry: (-(entry["last_timestamp"] or 0), entry["name"]))
+    return entries
@@ -1,105 +1,709 @@
+import contextlib
+import functools
+import itertools
 import json
-from datetime import datetime
+import os
 import re
+import sys
+import time
+from datetime import datetime
+import heapq
 from collections import Counter
 
+from message_store import ColumnarMessages
+from instrumentation import Instrumentation, peak_growth, peak_rss_bytes, profiled
+from message_archive import ARCHIVE_SUFFIX, is_archive, open_archive, write_archive
+
+# Only strings this short are memoized: emoji-only replies and one-word
+# answers repeat a lot, while longer text is nearly always unique and a
+# cache lookup would only add to its decode
+_DECODE_CACHE_MAX_LENGTH = 8
+_DECODE_CACHE_SIZE = 4096
+
+# Joins a batch of contents for decode_contents; a text holding it can't be split back
+_BATCH_SEPARATOR = "\0"
+# What surrogateescape decodes a byte that isn't UTF-8 to
+_ESCAPED_BYTE = re.compile('[\udc80-\udcff]')
+
+_decode_failures = 0
+
+@functools.lru_cache(maxsize=_DECODE_CACHE_SIZE)
+def _decode_short(text):
+    try:
+        return text.encode('latin1').decode('utf-8')
+    except UnicodeError:
+        return text
+
 def decode_content(text):
-    """Decode escape sequences to readable text."""
+    """Decode escape sequences to readable text.
+    
+    Text that can't be decoded is returned unchanged and counted (see
+    decode_failure_count) rather than reported.
+    """
+    global _decode_failures
     if not isinstance(text, str):
         return text
+    # Pure-ASCII text comes out of the latin1 -> utf-8 round-trip unchanged
+    if text.isascii():
+        return text
     
+    if len(text) <= _DECODE_CACHE_MAX_LENGTH:
+        decoded = _decode_short(text)
+        # A successful decode of non-ASCII text always shortens it
+        if len(decoded) == len(text):
+            _decode_failures += 1
+        return decoded
     try:
         # Handle standard Instagram encoding
-        return bytes(text, 'latin1').decode('utf-8')
-    except Exception as exc:
-        print(f"Primary decoding failed: {exc}")
+        return text.encode('latin1').decode('utf-8')
+    except UnicodeError:
+        # Text that is not latin1-escaped UTF-8 is returned unchanged
+        _decode_failures += 1
+        return text
+
+def decode_contents(texts):
+    """Decode a batch of message contents; same results as decode_content on each.
+    
+    The non-ASCII texts are joined and decoded in a single latin1 -> utf-8
+    round-trip. No UTF-8 sequence contains an ASCII byte, so each text
+    decodes as it would on its own; in a batch where some text isn't valid
+    UTF-8, its bytes are escaped instead and that text is kept as it is.
+    """
+    global _decode_failures
+    decoded_texts = list(texts)
+    positions = [i for i, text in enumerate(decoded_texts)
+                 if isinstance(text, str) and not text.isascii()]
+    if not positions:
+        return decoded_texts
+    batch = [decoded_texts[i] for i in positions]
+    try:
+        encoded = _BATCH_SEPARATOR.join(batch).encode('latin1')
+    except UnicodeError:
+        # Some text isn't latin1-escaped at all
+        return [decode_content(text) for text in decoded_texts]
+    try:
+        decoded = encoded.decode('utf-8').split(_BATCH_SEPARATOR)
+        escaped = False
+    except UnicodeDecodeError:
+        decoded = encoded.decode('utf-8', 'surrogateescape').split(_BATCH_SEPARATOR)
+        escaped = True
+    if len(decoded) != len(batch):
+        # Some text holds the separator itself
+        return [decode_content(text) for text in decoded_texts]
+    for i, text, original in zip(positions, decoded, batch):
+        # An escaped byte is a lone surrogate, which valid UTF-8 never yields
+        if escaped and _ESCAPED_BYTE.search(text):
+            text = original
+            _decode_failures += 1
+        decoded_texts[i] = text
+    return decoded_texts
+
+def decode_failure_count():
+    """Return how many strings decode_content has left undecoded in this process."""
+    return _decode_failures
+
+def reset_decode_failures():
+    global _decode_failures
+    _decode_failures = 0
+
+# Version of the filtering/decoding rules below; bump it whenever they change
+# so cached parse results from older rules are not reused
+PARSER_VERSION = 2
+
+# Message contents are decoded in batches of this many records
+_DECODE_BATCH_SIZE = 1024
+
+# Size of each read from disk while streaming a JSON export
+STREAM_CHUNK_SIZE = 64 * 1024
+
+_WHITESPACE = ' \t\n\r'
+# Characters that can continue a number the decoder stopped early on
+_NUMBER_CHARS = frozenset('0123456789.eE+-')
+# A decode error this close to the end of the buffer may just be a token
+# (literal, number or escape) cut by a chunk boundary
+_TRUNCATED_TOKEN_TAIL = 16
+_json_decoder = json.JSONDecoder()
+
+def _filter_message(msg, undecoded=None):
+    """Turn a raw Instagram message into a record, or None if it should be skipped.
+    
+    If an `undecoded` list is given, records whose content still needs
+    decode_content are appended to it instead, to be decoded in a batch.
+    """
+    sender = msg.get('sender_name', '')
+    timestamp = msg.get('timestamp_ms', 0)
+    
+    # Check for content or media/attachments
+    has_content = 'content' in msg and msg.get('content')
+    has_photos = 'photos' in msg and msg.get('photos')
+    has_videos = 'videos' in msg and msg.get('videos')
+    has_gifs = 'gifs' in msg and msg.get('gifs')
+    has_files = 'files' in msg and msg.get('files')
+    has_audio = 'audio_files' in msg and msg.get('audio_files')
+    has_share = 'share' in msg and msg.get('share')
+    
+    # Process messages with content
+    if has_content:
+        content = msg.get('content', '')
+        # Skip reaction messages, likes, and edited messages
+        if (content == "Liked a message" or
+            content.startswith("Reacted") or
+            content.startswith("Liked") or
+            "edited" in content or
+            "to your message" in content):
+            return None
+        record = {
+            'sender_name': sender,
+            'content': content,
+            'timestamp': timestamp
+        }
+        if undecoded is None:
+            record['content'] = decode_content(content)
+        else:
+            undecoded.append(record)
+        return record
+    
+    # Process "blank" messages with media
+    if has_photos or has_videos or has_gifs or has_files or has_audio or has_share:
+        # Determine the type of media
+        media_type = ""
+        if has_photos:
+            media_type = "[Photo]"
+        elif has_videos:
+            media_type = "[Video]"
+        elif has_gifs:
+            media_type = "[GIF]"
+        elif has_files:
+            media_type = "[File]"
+        elif has_audio:
+            media_type = "[Audio]"
+        elif has_share:
+            link = msg.get('share', {}).get('link', '')
+            media_type = f"[Shared: {link}]"
         
-        # Attempt alternative decodings
-        try:
-            return bytes(text.encode('latin1')).decode('utf-8')
-        except:
+        return {
+            'sender_name': sender,
+            'content': media_type,
+            'timestamp': timestamp
+        }
+    
+    # Include truly blank messages with a placeholder
+    return {
+        'sender_name': sender,
+        'content': "[Empty message]",
+        'timestamp': timestamp
+    }
+
+class _JSONStreamReader:
+    """Minimal pull reader over a text file for decoding JSON values one at a time.
+    
+    Only a small window of the file is held in memory: the buffer grows just
+    enough to hold the value currently being decoded.
+    """
+    
+    def __init__(self, file, chunk_size=STREAM_CHUNK_SIZE):
+        self.file = file
+        self.chunk_size = chunk_size
+        self.buffer = ''
+        self.pos = 0
+        self.eof = False
+    
+    def _fill(self):
+        """Read another chunk, dropping the consumed part of the buffer."""
+        if self.eof:
+            return False
+        # Reading at least as much as is buffered keeps a value spanning many
+        # chunks from being copied over and over
+        chunk = self.file.read(max(self.chunk_size, len(self.buffer) - self.pos))
+        if not chunk:
+            self.eof = True
+            return False
+        self.buffer = self.buffer[self.pos:] + chunk
+        self.pos = 0
+        return True
+    
+    def peek(self):
+        """Return the next non-whitespace character without consuming it."""
+        while True:
+            while self.pos < len(self.buffer) and self.buffer[self.pos] in _WHITESPACE:
+                self.pos += 1
+            if self.pos < len(self.buffer):
+                return self.buffer[self.pos]
+            if not self._fill():
+                raise ValueError("Unexpected end of JSON data")
+    
+    def expect(self, char):
+        if self.peek() != char:
+            raise ValueError(f"Expected {char!r} at offset {self.pos}")
+        self.pos += 1
+    
+    def value(self):
+        """Decode and return the next complete JSON value."""
+        self.peek()
+        while True:
             try:
-                return text.encode('ascii').decode('unicode_escape')
-            except:
-                return text
+                value, end = _json_decoder.raw_decode(self.buffer, self.pos)
+            except json.JSONDecodeError as exc:
+                # Only an error at the end of the buffer can be cured by more
+                # data; anything else is a malformed file
+                truncated = (exc.pos >= len(self.buffer) - _TRUNCATED_TOKEN_TAIL
+                             or exc.msg.startswith("Unterminated string"))
+                if not truncated or not self._fill():
+                    raise
+                continue
+            # A value running up to the end of the buffer, or a number stopped
+            # at a chunk boundary like "1." or "1e-", may be truncated, so only
+            # trust it once a delimiter follows.
+            if ((end == len(self.buffer) or self.buffer[end] in _NUMBER_CHARS)
+                    and self._fill()):
+                continue
+            self.pos = end
+            return value
+    
+    def array_items(self):
+        """Yield the elements of the JSON array starting at the current position."""
+        self.expect('[')
+        if self.peek() == ']':
+            self.pos += 1
+            return
+        while True:
+            yield self.value()
+            if self.peek() == ',':
+                self.pos += 1
+            else:
+                self.expect(']')
+                return
+
+def _decoded_batch(batch, undecoded):
+    """Decode the pending contents with decode_contents and yield the records."""
+    contents = decode_contents([record['content'] for record in undecoded])
+    for record, content in zip(undecoded, contents):
+        record['content'] = content
+    for record in batch:
+        yield "message", record
+
+def iter_instagram_json(file_path, chunk_size=STREAM_CHUNK_SIZE):
+    """Stream an Instagram JSON file without loading it all into memory.
+    
+    Yields ("participants", [names]) once the participants list has been read
+    and ("message", record) for each filtered/decoded message, in file order.
+    Read and JSON errors are raised to the caller.
+    """
+    with open(file_path, 'r', encoding='utf-8') as file:
+        reader = _JSONStreamReader(file, chunk_size)
+        reader.expect('{')
+        if reader.peek() == '}':
+            return
+        while True:
+            key = reader.value()
+            reader.expect(':')
+            if key == 'messages' and reader.peek() == '[':
+                batch = []
+                undecoded = []
+                for msg in reader.array_items():
+                    if isinstance(msg, dict):
+                        record = _filter_message(msg, undecoded)
+                        if record is not None:
+                            batch.append(record)
+                            if len(batch) == _DECODE_BATCH_SIZE:
+                                yield from _decoded_batch(batch, undecoded)
+                                batch = []
+                                undecoded = []
+                yield from _decoded_batch(batch, undecoded)
+            elif key == 'participants':
+                participants = reader.value() or []
+                yield "participants", [p.get('name', '') for p in participants]
+            else:
+                # Other top-level fields (title, thread_path, ...) are small
+                reader.value()
+            
+            if reader.peek() == ',':
+                reader.pos += 1
+            else:
+                reader.expect('}')
+                return
 
 def parse_instagram_json(file_path):
-    """Parse Instagram JSON file and return filtered/decoded messages and participants."""
+    """Parse Instagram JSON file and return filtered/decoded messages and participants.
+    
+    "decode_failures" counts the contents that could not be decoded and were
+    kept as they are.
+    """
+    participants = []
+    all_messages = []
+    failures = decode_failure_count()
+    
     try:
-        with open(file_path, 'r', encoding='utf-8') as file:
-            data = json.load(file)
+        for kind, value in iter_instagram_json(file_path):
+            if kind == "message":
+                all_messages.append(value)
+            else:
+                participants = value
     except Exception as exc:
-        print(f"Error reading file {file_path}: {exc}")
-        return {"messages": [], "participants": []}
+        print(f"Error reading file {file_path}: {exc}", file=sys.stderr)
+        return {"messages": [], "participants": [], "decode_failures": 0}
     
-    participants = [p.get('name', '') for p in data.get('participants', [])]
-    all_messages = []
+    return {"messages": all_messages, "participants": participants,
+            "decode_failures": decode_failure_count() - failures}
+
+def _stage(instrumentation, name, items=None, file=None):
+    """Instrumentation.stage, or an untimed stand-in when there is none."""
+    if instrumentation is None:
+        return contextlib.nullcontext({"items": items})
+    return instrumentation.stage(name, items, file)
+
+def _message_timestamp(msg):
+    return msg.get('timestamp', 0)
+
+def _parse_sorted(file_path, cache=None):
+    """Parse one file and order its messages newest-first, ready for merging.
+    
+    Returns (result, seconds, peak RSS growth in bytes), measured in the
+    process that did the parsing.
+    """
+    peak = peak_rss_bytes()
+    start = time.perf_counter()
+    result = cache.load(file_path) if cache is not None else parse_instagram_json(file_path)
+    # Export files are already newest-first, so this is a linear pass that
+    # only guards the merge against files that are not.
+    result["messages"].sort(key=_message_timestamp, reverse=True)
+    seconds = time.perf_counter() - start
+    return result, seconds, peak_growth(peak)
+
+def _parse_numbered(numbered_path, cache=None):
+    """_parse_sorted for a pool worker; keeps the file's index with its result."""
+    i, file_path = numbered_path
+    return i, _parse_sorted(file_path, cache)
+
+def parse_files(file_paths, max_workers=None, cache=None, progress=None, instrumentation=None):
+    """Parse several Instagram JSON files in parallel, each sorted newest-first.
+    
+    Files are parsed in a process pool (max_workers defaults to the CPU count).
+    If a ParseCache is given, unchanged files are loaded from it instead of
+    being parsed again. progress(file_path, result) is called as each file
+    finishes; an exception raised from it stops the load, including the
+    files still being parsed. With an Instrumentation, each file is
+    recorded as a "parse" stage.
+    
+    Returns:
+        List of parse_instagram_json results, in the order of file_paths
+    """
+    file_paths = list(file_paths)
+    results = [None] * len(file_paths)
+    
+    def finished(i, parsed):
+        results[i], seconds, growth = parsed
+        if instrumentation is not None:
+            instrumentation.record("parse", seconds, len(results[i]["messages"]), file_paths[i], growth)
+        if progress is not None:
+            progress(file_paths[i], results[i])
+    
+    # A pool with a single worker only adds the cost of pickling the results back
+    if (max_workers or os.cpu_count() or 1) == 1 or len(file_paths) <= 1:
+        for i, path in enumerate(file_paths):
+            finished(i, _parse_sorted(path, cache))
+    else:
+        import multiprocessing
+        # Leaving the block terminates the workers, so a cancelled load (or a
+        # viewer closed mid-load) doesn't wait for the files in progress
+        with multiprocessing.Pool(max_workers) as pool:
+            parse = functools.partial(_parse_numbered, cache=cache)
+            for i, parsed in pool.imap_unordered(parse, enumerate(file_paths)):
+                finished(i, parsed)
+    return results
+
+def _overlapping(streams):
+    """Indices of the newest-first streams whose time range meets another's."""
+    ranges = [(_message_timestamp(m[-1]), _message_timestamp(m[0])) if m else None for m in streams]
+    return [i for i, r in enumerate(ranges)
+            if r and any(j != i and other and other[0] <= r[1] and r[0] <= other[1]
+                         for j, other in enumerate(ranges))]
+
+def deduplicate_streams(streams):
+    """Drop the messages of each stream that an earlier stream already holds.
+    
+    Streams are message lists sorted newest-first, as parse_files returns
+    them, in priority order. Messages match when sender, timestamp and
+    content do. Copies are counted per stream, so a message sent twice in
+    one file and once in another is kept twice. Since the streams are
+    ordered by time, only messages sharing a timestamp are compared: memory
+    is bounded by the longest run of equal timestamps, not the message count.
+    
+    Returns:
+        (streams, duplicates): the streams without their duplicates (the
+        original lists where nothing was dropped) and the count dropped from each
+    """
+    streams = list(streams)
+    duplicates = [0] * len(streams)
+    # Streams whose time ranges don't overlap can't share messages
+    overlapping = _overlapping(streams)
+    if not overlapping:
+        return streams, duplicates
+    
+    kept = {i: [] for i in overlapping}
+    window = None
+    emitted = {}  # fingerprint -> copies kept at the current timestamp
+    seen = {}     # (fingerprint, stream) -> copies met in that stream so far
+    tagged = [zip(itertools.repeat(i), streams[i]) for i in overlapping]
+    for i, msg in heapq.merge(*tagged, key=lambda item: _message_timestamp(item[1]), reverse=True):
+        timestamp = _message_timestamp(msg)
+        if timestamp != window:
+            window = timestamp
+            emitted.clear()
+            seen.clear()
+        # The timestamp is the window itself, so only sender and content are hashed
+        fingerprint = hash((msg['sender_name'], msg.get('content')))
+        copies = seen.get((fingerprint, i), 0) + 1
+        seen[(fingerprint, i)] = copies
+        if copies > emitted.get(fingerprint, 0):
+            emitted[fingerprint] = copies
+            kept[i].append(msg)
+        else:
+            duplicates[i] += 1
+    
+    for i in overlapping:
+        if duplicates[i]:
+            streams[i] = kept[i]
+    return streams, duplicates
+
+def load_instagram_files(file_paths, max_workers=None, cache=None, progress=None, instrumentation=None):
+    """Parse several Instagram JSON files in parallel and merge them newest-first.
+    
+    Files are parsed with parse_files, messages that an earlier file already
+    holds are dropped by deduplicate_streams (overlapping exports of the same
+    conversation), and the already-sorted message lists are combined with a
+    k-way merge. The order matches sorting the concatenated messages by
+    timestamp, with ties kept in file order.
+    
+    Returns:
+        Dictionary with the merged "messages", the unique "participants" and
+        per-file "files" entries ({"path", "messages", "duplicates",
+        "decode_failures"}, where "messages" counts the file's messages
+        before duplicates were dropped)
+    """
+    file_paths = list(file_paths)
+    results = parse_files(file_paths, max_workers, cache, progress, instrumentation)
+    
+    with _stage(instrumentation, "deduplicate", sum(len(r["messages"]) for r in results)):
+        streams, duplicates = deduplicate_streams(r["messages"] for r in results)
+    
+    participants = {}
+    files = []
+    for path, result, dropped in zip(file_paths, results, duplicates):
+        participants.update(dict.fromkeys(result["participants"]))
+        files.append({"path": path, "messages": len(result["messages"]), "duplicates": dropped,
+                      "decode_failures": result.get("decode_failures", 0)})
+    
+    with _stage(instrumentation, "merge") as counts:
+        messages = list(heapq.merge(*streams,
+                                    key=_message_timestamp, reverse=True))
+        counts["items"] = len(messages)
+    return {"messages": messages, "participants": list(participants), "files": files}
+
+# Punctuation treated as word separators by the word analysis
+_WORD_SEPARATORS = str.maketrans({c: ' ' for c in ',.!?;:"\'()[]{}'})
+
+def tokenize_words(text):
+    """Split message text into lowercase words, ignoring common punctuation."""
+    return text.lower().translate(_WORD_SEPARATORS).split()
+
+class WordIndex:
+    """Word frequencies per sender and overall, built with one pass over the messages.
+    
+    Counts are bucketed by word length so a query for any min_length only looks
+    at the buckets it needs, and every message is tokenized exactly once no
+    matter how many (sender, top_n, min_length) queries are made afterwards.
+    """
+    
+    def __init__(self, messages=()):
+        # Key is the sender name, or None for all senders combined
+        self._buckets = {}  # key -> {word length: Counter}
+        self._order = {}    # key -> {word: first-seen position}, for stable ties
+        self.senders = {}   # sender -> message count, in first-seen order
+        for msg in messages:
+            self.add(msg['sender_name'], msg.get('content'))
+    
+    def add(self, sender, content):
+        """Tokenize one message and add its words to the sender and overall counts."""
+        self.senders[sender] = self.senders.get(sender, 0) + 1
+        if not content:
+            return
+        words = tokenize_words(content)
+        self._count(sender, words)
+        self._count(None, words)
+    
+    def _count(self, key, words):
+        buckets = self._buckets.setdefault(key, {})
+        order = self._order.setdefault(key, {})
+        for word in words:
+            bucket = buckets.get(len(word))
+            if bucket is None:
+                bucket = buckets[len(word)] = Counter()
+            if word not in order:
+                order[word] = len(order)
+            bucket[word] += 1
+    
+    def merge(self, other):
+        """Add another index's counts, as if its messages came after this one's."""
+        for sender, count in other.senders.items():
+            self.senders[sender] = self.senders.get(sender, 0) + count
+        for key, other_buckets in other._buckets.items():
+            buckets = self._buckets.setdefault(key, {})
+            order = self._order.setdefault(key, {})
+            for word in sorted(other._order[key], key=other._order[key].get):
+                if word not in order:
+                    order[word] = len(order)
+            for length, counter in other_buckets.items():
+                bucket = buckets.get(length)
+                if bucket is None:
+                    bucket = buckets[length] = Counter()
+                bucket.update(counter)
+        return self
+    
+    def most_common(self, sender=None, top_n=50, min_length=1):
+        """Return the top_n (word, count) pairs for a sender (None for all senders).
+        
+        Ties are ordered by first appearance, like Counter.most_common.
+        """
+        key = sender if sender else None
+        buckets = self._buckets.get(key, {})
+        order = self._order.get(key, {})
+        candidates = [item
+                      for length, bucket in buckets.items() if length >= min_length
+                      for item in bucket.items()]
+        rank = lambda item: (-item[1], order[item[0]])
+        if top_n is None:
+            return sorted(candidates, key=rank)
+        return heapq.nsmallest(top_n, candidates, key=rank)
+
+WORD_MODES = ("exact", "sketch", "spill")
+
+def make_word_index(mode="exact", **options):
+    """Return an empty word index for a word statistics mode.
+    
+    "exact" counts every word in memory (WordIndex). For vocabularies too
+    large for that, "sketch" keeps fixed-size approximate top-k sketches
+    (word_sketch.SketchWordIndex; option: capacity) and "spill" gives exact
+    counts by spilling partial counts to disk
+    (word_sketch.SpillingWordIndex; options: max_entries, directory,
+    keep_top).
+    """
+    if mode == "exact":
+        return WordIndex()
+    import word_sketch
+    if mode == "sketch":
+        return word_sketch.SketchWordIndex(**options)
+    if mode == "spill":
+        return word_sketch.SpillingWordIndex(**options)
+    raise ValueError(f"Unknown word statistics mode: {mode}")
+
+class MessageAggregator:
+    """Compute stats, the longest messages, the time range and word counts in one pass.
+    
+    Feed it messages with consume() (or add() one at a time); only the N
+    longest messages are kept, in a bounded heap. The results are exposed
+    through the usual MessageAnalyzer methods, which accept an aggregator in
+    place of a message list.
+    
+    Aggregators are mergeable: merge(b) gives the same result as consuming
+    b's messages after this one's, so per-file aggregators can be combined
+    without rescanning.
+    """
     
-    for msg in data.get('messages', []):
-        sender = msg.get('sender_name', '')
-        
-        # Check for content or media/attachments
-        has_content = 'content' in msg and msg.get('content')
-        has_photos = 'photos' in msg and msg.get('photos')
-        has_videos = 'videos' in msg and msg.get('videos')
-        has_gifs = 'gifs' in msg and msg.get('gifs')
-        has_files = 'files' in msg and msg.get('files')
-        has_audio = 'audio_files' in msg and msg.get('audio_files')
-        has_share = 'share' in msg and msg.get('share')
-        
-        # Process messages with content
-        if has_content:
-            content = msg.get('content', '')
-            # Skip reaction messages, likes, and edited messages
-            if (content != "Liked a message" and 
-                not content.startswith("Reacted") and 
-                not content.startswith("Liked") and
-                "edited" not in content and
-                "to your message" not in content):
-                decoded_content = decode_content(content)
-                timestamp = msg.get('timestamp_ms', 0)
-                
-                all_messages.append({
-                    'sender_name': sender,
-                    'content': decoded_content,
-                    'timestamp': timestamp
-                })
-        
-        # Process "blank" messages with media
-        elif has_photos or has_videos or has_gifs or has_files or has_audio or has_share:
-            # Determine the type of media
-            media_type = ""
-            if has_photos:
-                media_type = "[Photo]"
-            elif has_videos:
-                media_type = "[Video]"
-            elif has_gifs:
-                media_type = "[GIF]"
-            elif has_files:
-                media_type = "[File]"
-            elif has_audio:
-                media_type = "[Audio]"
-            elif has_share:
-                link = msg.get('share', {}).get('link', '')
-                media_type = f"[Shared: {link}]"
+    def __init__(self, longest=20, word_index=None):
+        self.longest_count = longest
+        self.total_messages = 0
+        self.sender_counts = {}
+        self.sender_chars = {}
+        self.first_timestamp = None
+        self.last_timestamp = None
+        self.word_index = WordIndex() if word_index is None else word_index
+        self._longest = []  # min-heap of (length, -position, message)
+    
+    def add(self, msg):
+        self.consume((msg,))
+    
+    def consume(self, messages):
+        """Add every message from an iterable; returns the aggregator."""
+        sender_counts = self.sender_counts
+        sender_chars = self.sender_chars
+        longest = self._longest
+        longest_count = self.longest_count
+        add_words = self.word_index.add
+        position = self.total_messages
+        first = self.first_timestamp
+        last = self.last_timestamp
+        
+        for msg in messages:
+            sender = msg['sender_name']
+            content = msg['content']
+            length = len(content) if content else 0
             
-            timestamp = msg.get('timestamp_ms', 0)
-            all_messages.append({
-                'sender_name': sender,
-                'content': media_type,
-                'timestamp': timestamp
-            })
+            sender_counts[sender] = sender_counts.get(sender, 0) + 1
+            sender_chars[sender] = sender_chars.get(sender, 0) + length
+            
+            # Keep the N longest; among equal lengths the earliest wins
+            if length and longest_count:
+                entry = (length, -position, msg)
+                if len(longest) < longest_count:
+                    heapq.heappush(longest, entry)
+                elif entry > longest[0]:
+                    heapq.heapreplace(longest, entry)
+            
+            timestamp = msg.get('timestamp', 0)
+            if first is None or timestamp < first:
+                first = timestamp
+            if last is None or timestamp > last:
+                last = timestamp
+            
+            add_words(sender, content)
+            position += 1
         
-        # Include truly blank messages with a placeholder
-        else:
-            timestamp = msg.get('timestamp_ms', 0)
-            all_messages.append({
-                'sender_name': sender,
-                'content': "[Empty message]",
-                'timestamp': timestamp
-            })
+        self.total_messages = position
+        self.first_timestamp = first
+        self.last_timestamp = last
+        return self
     
-    return {"messages": all_messages, "participants": participants}
+    def merge(self, other):
+        """Add another aggregator's results, as if its messages came after this one's."""
+        if other.total_messages == 0:
+            return self
+        # Other's positions continue after this one's, so ties still go to
+        # the earliest message
+        offset = self.total_messages
+        for length, negative_position, msg in other._longest:
+            entry = (length, negative_position - offset, msg)
+            if len(self._longest) < self.longest_count:
+                heapq.heappush(self._longest, entry)
+            elif entry > self._longest[0]:
+                heapq.heapreplace(self._longest, entry)
+        if self.first_timestamp is None or other.first_timestamp < self.first_timestamp:
+            self.first_timestamp = other.first_timestamp
+        if self.last_timestamp is None or other.last_timestamp > self.last_timestamp:
+            self.last_timestamp = other.last_timestamp
+        for sender, count in other.sender_counts.items():
+            self.sender_counts[sender] = self.sender_counts.get(sender, 0) + count
+            self.sender_chars[sender] = self.sender_chars.get(sender, 0) + other.sender_chars[sender]
+        self.total_messages += other.total_messages
+        self.word_index.merge(other.word_index)
+        return self
+    
+    def stats(self):
+        """Return the same dictionary as MessageAnalyzer.calculate_stats."""
+        return {
+            "total_messages": self.total_messages,
+            "sender_counts": dict(self.sender_counts),
+            "sender_chars": dict(self.sender_chars)
+        }
+    
+    def longest_messages(self, count=None):
+        """Return up to `count` (default: all kept) longest messages, longest first."""
+        ranked = [entry[2] for entry in sorted(self._longest, key=lambda e: (-e[0], -e[1]))]
+        return ranked if count is None else ranked[:count]
+
+@functools.lru_cache(maxsize=65536)
+def _format_minute(minute):
+    return datetime.fromtimestamp(minute * 60).strftime("%Y-%m-%d %H:%M")
 
 class MessageAnalyzer:
     """Analyze messages: stats, sorting, longest, etc."""
@@ -108,11 +712,27 @@ class MessageAnalyzer:
     def format_timestamp(timestamp_ms):
         if not timestamp_ms:
             return ""
-        dt = datetime.fromtimestamp(timestamp_ms / 1000)
-        return dt.strftime("%Y-%m-%d %H:%M:%S")
+        # Local time only changes by whole minutes, so each minute is
+        # converted once and the seconds are appended
+        seconds = int(timestamp_ms // 1000)
+        return f"{_format_minute(seconds // 60)}:{seconds % 60:02d}"
+    
+    @staticmethod
+    def aggregate(messages, longest=20, word_index=None):
+        """Run the fused single-pass aggregation over messages.
+        
+        word_index is the empty index to count words into (see
+        make_word_index); an exact in-memory WordIndex by default.
+        """
+        return MessageAggregator(longest, word_index).consume(messages)
     
     @staticmethod
     def calculate_stats(messages):
+        if isinstance(messages, MessageAggregator):
+            return messages.stats()
+        if isinstance(messages, ColumnarMessages):
+            return MessageAnalyzer._calculate_store_stats(messages)
+        
         sender_counts = {}
         sender_chars = {}
         
@@ -132,21 +752,71 @@ class MessageAnalyzer:
             "sender_chars": sender_chars
         }
     
+    @staticmethod
+    def _calculate_store_stats(store):
+        # Work on the sender ID and length columns; senders are numbered in
+        # first-seen order, so the dictionaries come out in the same order.
+        counts = [0] * len(store.senders)
+        chars = [0] * len(store.senders)
+        for sender_id, length in zip(store.sender_ids, store.lengths):
+            counts[sender_id] += 1
+            chars[sender_id] += length
+        return {
+            "total_messages": len(store),
+            "sender_counts": dict(zip(store.senders, counts)),
+            "sender_chars": dict(zip(store.senders, chars))
+        }
+    
     @staticmethod
     def find_longest_messages(messages, count=20):
-        valid_messages = [m for m in messages if m.get('content')]
-        return sorted(valid_messages, key=lambda x: len(x['content']), reverse=True)[:count]
+        if isinstance(messages, MessageAggregator):
+            # Limited to the aggregator's own `longest` size
+            return messages.longest_messages(count)
+        if isinstance(messages, ColumnarMessages):
+            lengths = messages.lengths
+            indices = heapq.nlargest(count, (i for i in range(len(messages)) if lengths[i]),
+                                     key=lengths.__getitem__)
+            return [messages[i] for i in indices]
+        
+        # Bounded top-k instead of sorting everything; ties keep message order
+        return heapq.nlargest(count, (m for m in messages if m.get('content')),
+                              key=lambda m: len(m['content']))
     
     @staticmethod
     def sort_by_timestamp(messages, reverse=True):
+        if isinstance(messages, ColumnarMessages):
+            order = sorted(range(len(messages)), key=messages.timestamps.__getitem__, reverse=reverse)
+            return messages.take(order)
+        
         return sorted(messages, key=lambda x: x.get('timestamp', 0), reverse=reverse)
     
+    @staticmethod
+    def build_word_index(messages, mode="exact", **options):
+        """Tokenize all messages once so word queries can be answered repeatedly.
+        
+        mode and options select the index like make_word_index.
+        """
+        index = make_word_index(mode, **options)
+        for msg in messages:
+            index.add(msg['sender_name'], msg.get('content'))
+        return index
+    
+    @staticmethod
+    def _word_index(messages):
+        # Any word index (WordIndex or a word_sketch index) answers directly
+        if hasattr(messages, "most_common"):
+            return messages
+        if isinstance(messages, MessageAggregator):
+            return messages.word_index
+        return WordIndex(messages)
+    
     @staticmethod
     def find_most_common_words(messages, sender=None, top_n=50, min_length=1):
         """Find most common words used by a specific sender or all senders.
         
         Args:
-            messages: List of message dictionaries
+            messages: List of message dictionaries, a prebuilt word index
+                (see build_word_index) or a MessageAggregator
             sender: Specific sender to analyze (None for all)
             top_n: Number of top words to return
             min_length: Minimum word length to consider
@@ -154,42 +824,500 @@ class MessageAnalyzer:
         Returns:
             List of (word, count) tuples for the most common words
         """
-        # Filter messages by sender if specified
-        if sender:
-            filtered_msgs = [m for m in messages if m['sender_name'] == sender]
-        else:
-            filtered_msgs = messages
-        
-        # Extract all words from messages
-        all_words = []
-        for msg in filtered_msgs:
-            if 'content' in msg and msg['content']:
-                # Convert to lowercase and split by common separators
-                text = msg['content'].lower()
-                # Replace common punctuation with spaces
-                text = re.sub(r'[,.!?;:"\'\(\)\[\]\{\}]', ' ', text)
-                # Split by whitespace and filter out short words
-                words = [w.strip() for w in text.split() if len(w.strip()) >= min_length]
-                all_words.extend(words)
-        
-        # Count word occurrences and return top N
-        word_counts = Counter(all_words)
-        return word_counts.most_common(top_n)
+        return MessageAnalyzer._word_index(messages).most_common(sender, top_n, min_length)
     
     @staticmethod
     def analyze_word_usage_by_sender(messages, top_n=50, min_length=1):
         """Analyze word usage for each sender.
         
+        Accepts a list of message dictionaries, a prebuilt word index (see
+        build_word_index) or a MessageAggregator.
+        
         Returns:
             Dictionary mapping each sender to their most common words
         """
-        # Get unique senders
-        senders = set(m['sender_name'] for m in messages)
+        index = MessageAnalyzer._word_index(messages)
         
         # Find most common words for each sender
         result = {}
-        for sender in senders:
-            result[sender] = MessageAnalyzer.find_most_common_words(
-                messages, sender, top_n, min_length)
+        for sender in index.senders:
+            result[sender] = index.most_common(sender, top_n, min_length)
         
-        return result
\ No newline at end of file
+        return result
+
+def summarize_aggregate(aggregator, longest=20):
+    """Turn a MessageAggregator into the results the viewer shows.
+    
+    Returns:
+        Dictionary with "stats", the "longest" messages, per-sender
+        "word_usage" (top 50, all lengths) and "word_usage_longer" (top 30,
+        4+ characters), overall "all_words_short"/"all_words_long" (top 50)
+        and the "first_timestamp"/"last_timestamp" of the conversation
+    """
+    return {
+        "stats": MessageAnalyzer.calculate_stats(aggregator),
+        "longest": MessageAnalyzer.find_longest_messages(aggregator, longest),
+        "word_usage": MessageAnalyzer.analyze_word_usage_by_sender(aggregator, top_n=50, min_length=1),
+        "word_usage_longer": MessageAnalyzer.analyze_word_usage_by_sender(aggregator, top_n=30, min_length=4),
+        "all_words_short": MessageAnalyzer.find_most_common_words(aggregator, sender=None, top_n=50, min_length=1),
+        "all_words_long": MessageAnalyzer.find_most_common_words(aggregator, sender=None, top_n=50, min_length=4),
+        "first_timestamp": aggregator.first_timestamp,
+        "last_timestamp": aggregator.last_timestamp
+    }
+
+def analyze_messages(messages, longest=20, word_index=None):
+    """Compute everything the viewer shows for a conversation in one pass.
+    
+    Returns the same dictionary as summarize_aggregate.
+    """
+    # One scan feeds the stats, the longest-message heap and the word index
+    return summarize_aggregate(MessageAnalyzer.aggregate(messages, longest, word_index), longest)
+
+class AnalysisSession:
+    """A set of loaded files whose analysis is updated incrementally.
+    
+    Each file keeps its own sorted messages and MessageAggregator. Adding a
+    file only parses that file and merges its messages in; it is aggregated
+    the first time summary() is asked for, so loading never pays for word
+    statistics nobody looks at. The totals are the files' aggregators merged
+    in load order, so they match a fresh session of the same files, ties
+    included; removing a file re-merges the other files' aggregators instead
+    of re-analyzing their messages.
+    
+    Messages a new file shares with the loaded ones (overlapping exports)
+    are dropped by deduplicate_streams, so they are only counted once.
+    Removing a file re-processes the later files that had dropped some.
+    """
+    
+    def __init__(self, longest=20, cache=None):
+        self.longest = longest
+        self.cache = cache
+        # {"path", "parsed", "messages", "duplicates", "decode_failures",
+        #  "participants", "aggregator"}
+        # in load order; "messages" is "parsed" without the dropped duplicates
+        self.files = []
+        self.aggregator = MessageAggregator(longest)
+        self._merged = []  # the file aggregators in self.aggregator, in order
+        self._messages = []
+    
+    @property
+    def paths(self):
+        return [f["path"] for f in self.files]
+    
+    def add_files(self, file_paths, max_workers=None, progress=None, instrumentation=None):
+        """Parse and merge in files that aren't loaded yet; returns the paths added."""
+        loaded = set(self.paths)
+        new_paths = [p for p in dict.fromkeys(file_paths) if p not in loaded]
+        results = parse_files(new_paths, max_workers, self.cache, progress, instrumentation)
+        
+        # The loaded messages take priority over the new files' copies
+        with _stage(instrumentation, "deduplicate", sum(len(r["messages"]) for r in results)):
+            streams, duplicates = deduplicate_streams([self._messages] + [r["messages"] for r in results])
+        for path, result, messages, dropped in zip(new_paths, results, streams[1:], duplicates[1:]):
+            self.files.append({
+                "path": path,
+                "parsed": result["messages"],
+                "messages": messages,
+                "duplicates": dropped,
+                "decode_failures": result.get("decode_failures", 0),
+                "participants": result["participants"],
+                "aggregator": None  # filled in by aggregate()
+            })
+        # Existing messages come first on equal timestamps, like file order
+        with _stage(instrumentation, "merge") as counts:
+            self._messages = list(heapq.merge(self._messages, *streams[1:],
+                                              key=_message_timestamp, reverse=True))
+            counts["items"] = len(self._messages)
+        return new_paths
+    
+    def remove_file(self, file_path, instrumentation=None):
+        """Take a loaded file's messages and results back out of the session."""
+        for i, entry in enumerate(self.files):
+            if entry["path"] == file_path:
+                break
+        else:
+            raise ValueError(f"{file_path} is not loaded")
+        del self.files[i]
+        
+        # Later files may have dropped messages that only the removed file
+        # shared with them. Dropping only shrinks as files go, so a file
+        # whose count is unchanged kept the same messages.
+        if any(f["duplicates"] for f in self.files[i:]):
+            with _stage(instrumentation, "deduplicate", sum(len(f["parsed"]) for f in self.files)):
+                streams, duplicates = deduplicate_streams(f["parsed"] for f in self.files)
+            for f, messages, dropped in zip(self.files, streams, duplicates):
+                if dropped != f["duplicates"]:
+                    f.update(messages=messages, duplicates=dropped, aggregator=None)
+        
+        # The totals are re-merged from the remaining files by aggregate()
+        with _stage(instrumentation, "merge") as counts:
+            self._messages = list(heapq.merge(*[f["messages"] for f in self.files],
+                                              key=_message_timestamp, reverse=True))
+            counts["items"] = len(self._messages)
+    
+    @property
+    def messages(self):
+        """All loaded messages, newest first."""
+        return self._messages
+    
+    @property
+    def participants(self):
+        participants = {}
+        for entry in self.files:
+            participants.update(dict.fromkeys(entry["participants"]))
+        return list(participants)
+    
+    def file_info(self):
+        return [{"path": f["path"], "messages": len(f["parsed"]), "duplicates": f["duplicates"],
+                 "decode_failures": f["decode_failures"]} for f in self.files]
+    
+    def aggregate(self, instrumentation=None):
+        """Aggregate the files that need it and return the totals."""
+        for entry in self.files:
+            if entry["aggregator"] is None:
+                with _stage(instrumentation, "aggregate", len(entry["messages"]), entry["path"]):
+                    entry["aggregator"] = MessageAggregator(self.longest).consume(entry["messages"])
+        parts = [f["aggregator"] for f in self.files]
+        merged = len(self._merged)
+        # Appended files are merged onto the totals; after a removal or a
+        # re-processed file they are rebuilt from the parts, in load order
+        if parts[:merged] != self._merged:
+            self.aggregator = MessageAggregator(self.longest)
+            merged = 0
+        with _stage(instrumentation, "merge totals", sum(p.total_messages for p in parts[merged:])):
+            for part in parts[merged:]:
+                self.aggregator.merge(part)
+        self._merged = parts
+        return self.aggregator
+    
+    def summary(self, instrumentation=None):
+        """Return summarize_aggregate results for everything loaded."""
+        return summarize_aggregate(self.aggregate(instrumentation), self.longest)
+
+def _message_file_key(file_path):
+    """Sort key putting message_2.json before message_10.json."""
+    name = os.path.basename(file_path)
+    number = re.search(r'(\d+)', name)
+    return (int(number.group(1)) if number else 0, name)
+
+def _conversation_files(directory):
+    """Return the message_N.json files of a conversation directory, in order."""
+    names = [n for n in os.listdir(directory) if n.startswith("message_") and n.endswith(".json")]
+    return sorted((os.path.join(directory, n) for n in names), key=_message_file_key)
+
+def find_conversations(paths, recursive=False):
+    """Group command-line paths into (name, [files]) conversations.
+    
+    Files given directly form one conversation together, like a selection in
+    the viewer, except message archives, which are a conversation each. Each
+    directory is a conversation of its message_N.json files; with
+    recursive=True every directory below it holding such files is one.
+    """
+    files = [p for p in paths if not os.path.isdir(p)]
+    conversations = []
+    for path in [p for p in files if is_archive(p)]:
+        files.remove(path)
+        name = os.path.basename(path)
+        if name.endswith(ARCHIVE_SUFFIX):
+            name = name[:-len(ARCHIVE_SUFFIX)]
+        conversations.append((name, [path]))
+    if files:
+        name = os.path.basename(os.path.dirname(os.path.abspath(files[0])))
+        conversations.append((name, files))
+    
+    for directory in (p for p in paths if os.path.isdir(p)):
+        if recursive:
+            for root, dirs, _ in os.walk(directory):
+                dirs.sort()
+                conversation = _conversation_files(root)
+                if conversation:
+                    conversations.append((os.path.basename(os.path.abspath(root)), conversation))
+        else:
+            conversation = _conversation_files(directory)
+            if conversation:
+                conversations.append((os.path.basename(os.path.abspath(directory)), conversation))
+    return conversations
+
+def _longest_record(message):
+    return {
+        "sender_name": message['sender_name'],
+        "timestamp": message.get('timestamp', 0),
+        "time": MessageAnalyzer.format_timestamp(message.get('timestamp', 0)),
+        "characters": len(message['content']),
+        "content": message['content']
+    }
+
+def load_conversation(file_paths, max_workers=None, cache=None, instrumentation=None):
+    """Load a conversation from message_N.json files or from one message archive.
+    
+    Returns a dictionary like load_instagram_files; for an archive the
+    "messages" are the memory-mapped MappedArchive.
+    """
+    if len(file_paths) == 1 and is_archive(file_paths[0]):
+        with _stage(instrumentation, "open_archive", file=file_paths[0]) as counts:
+            archive = open_archive(file_paths[0])
+            counts["items"] = len(archive)
+        return {
+            "messages": archive,
+            "participants": archive.participants,
+            "files": archive.files or [{"path": file_paths[0], "messages": len(archive)}]
+        }
+    return load_instagram_files(file_paths, max_workers, cache, instrumentation=instrumentation)
+
+def analyze_conversation(name, file_paths, longest=20, max_workers=1, cache=None, diagnostics=False,
+                         archive_path=None, word_mode="exact", word_options=None):
+    """Load and analyze one conversation into a JSON-serializable summary.
+    
+    With diagnostics=True the summary also holds the Instrumentation report
+    of the run under "diagnostics". With an archive_path the loaded messages
+    are also saved there as a message archive. word_mode and word_options
+    choose the word index like make_word_index.
+    """
+    from timeline import analyze_timeline
+    instrumentation = Instrumentation() if diagnostics else None
+    result = load_conversation(file_paths, max_workers, cache, instrumentation)
+    if archive_path is not None:
+        with _stage(instrumentation, "write_archive", len(result["messages"])):
+            write_archive(archive_path, result["messages"], result["participants"], result["files"])
+    with _stage(instrumentation, "analyze", len(result["messages"])):
+        word_index = make_word_index(word_mode, **(word_options or {}))
+        analysis = analyze_messages(result["messages"], longest, word_index)
+    with _stage(instrumentation, "timeline", len(result["messages"])):
+        timeline = analyze_timeline(result["messages"])
+    summary = {
+        "conversation": name,
+        "files": result["files"],
+        "participants": result["participants"],
+        "first_timestamp": analysis["first_timestamp"],
+        "last_timestamp": analysis["last_timestamp"],
+        "stats": analysis["stats"],
+        "timeline": timeline,
+        "longest": [_longest_record(m) for m in analysis["longest"]],
+        "words": {
+            "by_sender": analysis["word_usage"],
+            "by_sender_4plus": analysis["word_usage_longer"],
+            "overall": analysis["all_words_short"],
+            "overall_4plus": analysis["all_words_long"],
+            "mode": word_mode
+        }
+    }
+    if word_mode == "sketch":
+        # Most any reported count can exceed the true count
+        summary["words"]["max_overcount"] = word_index.error_bound()
+    if instrumentation is not None:
+        summary["diagnostics"] = instrumentation.report()
+        summary["diagnostics"]["decode_failures"] = sum(f.get("decode_failures", 0)
+                                                        for f in result["files"])
+    return summary
+
+CSV_FIELDS = ["conversation", "section", "sender", "rank", "value", "count", "timestamp"]
+
+def summary_csv_rows(summary):
+    """Flatten an analyze_conversation summary into CSV_FIELDS rows."""
+    name = summary["conversation"]
+    stats = summary["stats"]
+    yield [name, "total_messages", "", "", "", stats["total_messages"], ""]
+    for sender, count in stats["sender_counts"].items():
+        yield [name, "sender_messages", sender, "", "", count, ""]
+        yield [name, "sender_characters", sender, "", "", stats["sender_chars"][sender], ""]
+    timeline = summary["timeline"]
+    for section in ("hourly", "weekday"):
+        for sender, counts in timeline[section].items():
+            for bucket, count in enumerate(counts):
+                yield [name, section, sender, bucket, "", count, ""]
+    for sender, counts in timeline["monthly"].items():
+        for month, count in zip(timeline["months"], counts):
+            yield [name, "monthly", sender, "", month, count, ""]
+    for sender, response in timeline["response_times"].items():
+        yield [name, "response_median_ms", sender, "", "", response["median_ms"], ""]
+    for rank, message in enumerate(summary["longest"], 1):
+        yield [name, "longest", message["sender_name"], rank, message["content"],
+               message["characters"], message["time"]]
+    words = summary["words"]
+    for section in ("by_sender", "by_sender_4plus"):
+        for sender, counts in words[section].items():
+            for rank, (word, count) in enumerate(counts, 1):
+                yield [name, f"words_{section}", sender, rank, word, count, ""]
+    for section in ("overall", "overall_4plus"):
+        for rank, (word, count) in enumerate(words[section], 1):
+            yield [name, f"words_{section}", "", rank, word, count, ""]
+
+def _write_summary(summary, output, output_format, write_header):
+    if output_format == "json":
+        output.write(json.dumps(summary, ensure_ascii=False) + "\n")
+    else:
+        import csv
+        writer = csv.writer(output)
+        if write_header:
+            writer.writerow(CSV_FIELDS)
+        writer.writerows(summary_csv_rows(summary))
+
+def _split_diagnostics(summaries, diagnostics):
+    """Write each summary's "diagnostics" report to its own stream as a JSON line."""
+    for summary in summaries:
+        report = summary.pop("diagnostics", None)
+        if report is not None:
+            diagnostics.write(json.dumps({"conversation": summary["conversation"], **report},
+                                         ensure_ascii=False) + "\n")
+        yield summary
+
+def _output_file_name(name, output_format, used):
+    """Pick a unique, filesystem-safe file name for a conversation's output."""
+    base = re.sub(r'[^\w.-]+', '_', name) or "conversation"
+    candidate, n = base, 1
+    while candidate in used:
+        n += 1
+        candidate = f"{base}_{n}"
+    used.add(candidate)
+    return f"{candidate}.{output_format}"
+
+def main(argv=None):
+    """Command-line entry point: analyze conversations without the viewer."""
+    import argparse
+    
+    parser = argparse.ArgumentParser(
+        prog="instagram_message_parser",
+        description="Compute message statistics, longest messages and word usage "
+                    "for Instagram message exports.")
+    parser.add_argument("paths", nargs="+",
+                        help="message_N.json files (analyzed together as one conversation), "
+                             "conversation directories or message archives")
+    parser.add_argument("-r", "--recursive", action="store_true",
+                        help="treat every directory below the given ones that contains "
+                             "message_N.json files as a conversation")
+    parser.add_argument("-e", "--export", action="store_true",
+                        help="treat the paths as roots of full Instagram data exports and "
+                             "analyze every conversation in their inbox")
+    parser.add_argument("--catalog", action="store_true",
+                        help="with --export, list each conversation's participants, message "
+                             "count, date range and size (as JSON lines) without analyzing it")
+    parser.add_argument("-f", "--format", choices=["json", "csv"], default="json",
+                        help="json writes one object per conversation per line (default: json)")
+    parser.add_argument("-o", "--output", default="-",
+                        help="output file, or - for stdout (default: -)")
+    parser.add_argument("--output-dir",
+                        help="write one file per conversation into this directory instead")
+    parser.add_argument("-j", "--workers", type=int, default=None,
+                        help="worker processes (default: CPU count)")
+    parser.add_argument("--longest", type=int, default=20,
+                        help="number of longest messages to report (default: 20)")
+    parser.add_argument("--cache-dir",
+                        help="reuse parsed files from this parse cache directory")
+    parser.add_argument("--words", choices=WORD_MODES, default="exact",
+                        help="word statistics: exact in memory (default), sketch for fixed-memory "
+                             "approximate counts, or spill for exact counts spilled to disk")
+    parser.add_argument("--sketch-size", type=int,
+                        help="counters per sender and word length in sketch mode (default: 2000)")
+    parser.add_argument("--spill-entries", type=int,
+                        help="distinct words held in memory before spilling in spill mode "
+                             "(default: 1000000)")
+    parser.add_argument("--spill-dir", help="directory for spill mode run files (default: system temp)")
+    parser.add_argument("--archive-dir",
+                        help="also save each conversation into this directory as a "
+                             f"memory-mapped message archive (<name>{ARCHIVE_SUFFIX}) that "
+                             "later runs and the viewer open without parsing")
+    parser.add_argument("--diagnostics", metavar="FILE",
+                        help="write per-stage and per-file timings, item counts and peak memory "
+                             "growth as JSON lines to FILE, or - for stderr")
+    parser.add_argument("--profile", metavar="FILE",
+                        help="run under cProfile and save the stats to FILE (work done in "
+                             "worker processes is not profiled; use -j 1 to include it)")
+    args = parser.parse_args(argv)
+    
+    if args.catalog and not args.export:
+        parser.error("--catalog requires --export")
+    if args.export:
+        import export_catalog
+        if args.catalog:
+            output = sys.stdout if args.output == "-" else open(args.output, 'w', encoding='utf-8')
+            try:
+                for root in args.paths:
+                    for entry in export_catalog.build_catalog(root, args.workers):
+                        output.write(json.dumps(entry, ensure_ascii=False) + "\n")
+            finally:
+                if output is not sys.stdout:
+                    output.close()
+            return 0
+        conversations = [c for root in args.paths
+                         for c in export_catalog.find_export_conversations(root)]
+    else:
+        conversations = find_conversations(args.paths, args.recursive)
+    if not conversations:
+        parser.error("no message files found")
+    
+    cache = None
+    if args.cache_dir:
+        from parse_cache import ParseCache
+        cache = ParseCache(args.cache_dir)
+    
+    word_options = {}
+    if args.words == "sketch" and args.sketch_size:
+        word_options["capacity"] = args.sketch_size
+    if args.words == "spill":
+        if args.spill_entries:
+            word_options["max_entries"] = args.spill_entries
+        if args.spill_dir:
+            word_options["directory"] = args.spill_dir
+    
+    archive_paths = [None] * len(conversations)
+    if args.archive_dir:
+        os.makedirs(args.archive_dir, exist_ok=True)
+        used = set()
+        archive_paths = [os.path.join(args.archive_dir,
+                                      _output_file_name(name, ARCHIVE_SUFFIX.lstrip("."), used))
+                         for name, _ in conversations]
+    
+    diagnostics = None
+    if args.diagnostics:
+        diagnostics = sys.stderr if args.diagnostics == "-" else open(args.diagnostics, 'w', encoding='utf-8')
+    
+    # One conversation: parallelize over its files. Many: over conversations.
+    if len(conversations) == 1 or args.workers == 1:
+        summaries = (analyze_conversation(name, files, args.longest, args.workers, cache,
+                                          diagnostics is not None, archive_path,
+                                          args.words, word_options)
+                     for (name, files), archive_path in zip(conversations, archive_paths))
+        executor = None
+    else:
+        from concurrent.futures import ProcessPoolExecutor
+        executor = ProcessPoolExecutor(max_workers=args.workers)
+        summaries = executor.map(analyze_conversation,
+                                 [name for name, _ in conversations],
+                                 [files for _, files in conversations],
+                                 [args.longest] * len(conversations),
+                                 [1] * len(conversations),
+                                 [cache] * len(conversations),
+                                 [diagnostics is not None] * len(conversations),
+                                 archive_paths,
+                                 [args.words] * len(conversations),
+                                 [word_options] * len(conversations))
+    summaries = _split_diagnostics(summaries, diagnostics)
+    
+    try:
+        with profiled(args.profile is not None) as profiler:
+            if args.output_dir:
+                os.makedirs(args.output_dir, exist_ok=True)
+                used = set()
+                for summary in summaries:
+                    file_name = _output_file_name(summary["conversation"], args.format, used)
+                    with open(os.path.join(args.output_dir, file_name), 'w', encoding='utf-8', newline='') as output:
+                        _write_summary(summary, output, args.format, True)
+            else:
+                output = sys.stdout if args.output == "-" else open(args.output, 'w', encoding='utf-8', newline='')
+                try:
+                    for i, summary in enumerate(summaries):
+                        _write_summary(summary, output, args.format, i == 0)
+                finally:
+                    if output is not sys.stdout:
+                        output.close()
+        if profiler is not None:
+            profiler.dump_stats(args.profile)
+    finally:
+        if executor is not None:
+            executor.shutdown()
+        if diagnostics is not None and diagnostics is not sys.stderr:
+            diagnostics.close()
+    return 0
+
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,125 @@
+import contextlib
+import sys
+import time
+
+try:
+    import resource
+except ImportError:  # not available on Windows
+    resource = None
+
+def peak_rss_bytes():
+    """Return this process's peak resident set size in bytes, or None if unknown."""
+    if resource is None:
+        return None
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    # Linux reports kilobytes, macOS bytes
+    return peak if sys.platform == "darwin" else peak * 1024
+
+def peak_growth(before):
+    """Return how far the peak RSS rose since peak_rss_bytes() returned `before`."""
+    after = peak_rss_bytes()
+    return after - before if before is not None and after is not None else None
+
+class Instrumentation:
+    """Wall time, item counts and peak memory growth of each load and analysis stage.
+
+    A stage costs two perf_counter and two getrusage calls, so instrumentation
+    is always on. The peak resident set size only ever rises, so a stage
+    records how far it raised it: 0 means the stage fit under an earlier
+    peak, not that it allocated nothing. Stages that ran in worker processes
+    are recorded with the timing and growth measured in the worker.
+    """
+
+    def __init__(self):
+        self.started = time.perf_counter()
+        self.stages = []  # {"stage", "seconds", "items", "peak_growth_bytes"[, "file"]}
+
+    def record(self, name, seconds, items=None, file=None, growth=None):
+        """Add a finished stage; growth is its peak_growth, None if not measured."""
+        entry = {
+            "stage": name,
+            "seconds": seconds,
+            "items": items,
+            "peak_growth_bytes": growth
+        }
+        if file is not None:
+            entry["file"] = file
+        self.stages.append(entry)
+        return entry
+
+    @contextlib.contextmanager
+    def stage(self, name, items=None, file=None):
+        """Time the body as one stage. The yielded dictionary's "items" may be
+        set inside the block once the count is known."""
+        counts = {"items": items}
+        peak = peak_rss_bytes()
+        start = time.perf_counter()
+        yield counts
+        self.record(name, time.perf_counter() - start, counts["items"], file, peak_growth(peak))
+
+    def totals(self):
+        """Return {stage: {"calls", "seconds", "items"}} summed over files."""
+        totals = {}
+        for entry in self.stages:
+            total = totals.setdefault(entry["stage"], {"calls": 0, "seconds": 0.0, "items": 0})
+            total["calls"] += 1
+            total["seconds"] += entry["seconds"]
+            total["items"] += entry["items"] or 0
+        return totals
+
+    def report(self):
+        """Return the recorded stages as a JSON-serializable dictionary.
+
+        "peak_rss_bytes" is this process's peak over its whole lifetime.
+        """
+        return {
+            "wall_seconds": time.perf_counter() - self.started,
+            "peak_rss_bytes": peak_rss_bytes(),
+            "totals": self.totals(),
+            "stages": list(self.stages)
+        }
+
+def format_report(report):
+    """Render an Instrumentation.report() as a plain-text table."""
+    def mib(value):
+        return f"{value / 2**20:.1f}" if value is not None else "-"
+
+    lines = [f"{'stage':<16} {'calls':>6} {'seconds':>9} {'items':>10} {'items/s':>12}"]
+    for name, total in report["totals"].items():
+        rate = f"{total['items'] / total['seconds']:,.0f}" if total["items"] and total["seconds"] else "-"
+        lines.append(f"{name:<16} {total['calls']:>6} {total['seconds']:>9.3f} {total['items']:>10} {rate:>12}")
+    lines.append(f"Wall time: {report['wall_seconds']:.3f}s, "
+                 f"process peak memory so far: {mib(report['peak_rss_bytes'])} MiB")
+
+    per_file = [e for e in report["stages"] if "file" in e]
+    if per_file:
+        lines.append("")
+        lines.append(f"{'stage':<16} {'seconds':>9} {'items':>10} {'peak +MiB':>9}  file")
+        for entry in per_file:
+            lines.append(f"{entry['stage']:<16} {entry['seconds']:>9.3f} {entry['items'] or 0:>10} "
+                         f"{mib(entry['peak_growth_bytes']):>9}  {entry['file']}")
+        lines.append("(peak +MiB: how far the stage raised its process's peak memory)")
+    return "\n".join(lines)
+
+@contextlib.contextmanager
+def profiled(enabled=True):
+    """Run the body under cProfile when enabled; yields the profiler or None."""
+    if not enabled:
+        yield None
+        return
+    # Imported here: cProfile and pstats add noticeably to startup
+    import cProfile
+    profiler = cProfile.Profile()
+    profiler.enable()
+    try:
+        yield profiler
+    finally:
+        profiler.disable()
+
+def profile_summary(profiler, limit=30):
+    """Return the top `limit` functions of a profile by cumulative time."""
+    import io
+    import pstats
+    output = io.StringIO()
+    pstats.Stats(profiler, stream=output).sort_stats("cumulative").print_stats(limit)
+    return output.getvalue()
@@ -0,0 +1,83 @@
+import queue
+import threading
+
+class LoadCancelled(Exception):
+    """Raised inside a job when a newer job has replaced it."""
+
+class LoadPipeline:
+    """Run load/analysis jobs off the Tk thread and deliver their results on it.
+
+    A job is a callable taking a `report(kind, payload)` function. Reports are
+    queued by the worker and handed to `on_event(kind, payload)` from the Tk
+    main loop, which polls the queue with `root.after`. Jobs run one at a
+    time, in the order they were started. Starting a job with replace=True
+    (a new file set) cancels the running and queued jobs instead: their next
+    report raises LoadCancelled and any events they already queued are
+    dropped. The worker is a daemon thread, so a job still running when the
+    window closes doesn't keep the process alive.
+    """
+
+    def __init__(self, root, on_event, poll_interval=50):
+        self.root = root
+        self.on_event = on_event
+        self.poll_interval = poll_interval
+        self.events = queue.Queue()
+        self.jobs = queue.Queue()
+        self.generation = 0
+        self._cancel_event = threading.Event()
+        threading.Thread(target=self._work, daemon=True).start()
+        self.root.after(self.poll_interval, self._poll)
+
+    def start(self, job, replace=False):
+        """Queue `job` to run in the background after the jobs already started.
+
+        With replace=True the running and queued jobs are cancelled first.
+        """
+        if replace:
+            self.cancel()
+        self.jobs.put((self.generation, self._cancel_event, job))
+
+    def cancel(self):
+        """Cancel the running and queued jobs; their events are dropped."""
+        self._cancel_event.set()
+        self.generation += 1
+        self._cancel_event = threading.Event()
+
+    def shutdown(self):
+        """Cancel every job and stop the worker without waiting for it."""
+        self.cancel()
+        self.jobs.put(None)
+
+    def _work(self):
+        while True:
+            item = self.jobs.get()
+            if item is None:
+                return
+            self._run(*item)
+
+    def _run(self, generation, cancel_event, job):
+        def report(kind, payload=None):
+            if cancel_event.is_set():
+                raise LoadCancelled()
+            self.events.put((generation, kind, payload))
+
+        try:
+            report("started")
+            job(report)
+            report("finished")
+        except LoadCancelled:
+            pass
+        except Exception as exc:
+            self.events.put((generation, "error", exc))
+
+    def _poll(self):
+        try:
+            while True:
+                generation, kind, payload = self.events.get_nowait()
+                # Results from a cancelled job are stale
+                if generation == self.generation:
+                    self.on_event(kind, payload)
+        except queue.Empty:
+            pass
+        finally:
+            self.root.after(self.poll_interval, self._poll)
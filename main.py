@@ -1,11 +1,23 @@
 import tkinter as tk
-from tkinter import filedialog, ttk
+from tkinter import filedialog, messagebox, ttk
+from datetime import datetime, timedelta
 import os
+import functools
 import ctypes
 import re
+import time
 
 # Import from our custom module
-from instagram_message_parser import parse_instagram_json, MessageAnalyzer
+from instagram_message_parser import AnalysisSession, MessageAnalyzer, summarize_aggregate
+from parse_cache import ParseCache
+from message_view import VirtualMessageView
+from load_pipeline import LoadPipeline
+from search_index import MAX_PREFIX_EXPANSIONS, SearchIndex
+from timeline import WEEKDAYS, analyze_timeline, format_duration
+from export_catalog import build_catalog
+from catalog_window import ConversationCatalog
+from message_archive import ARCHIVE_SUFFIX, open_archive, write_archive
+from instrumentation import Instrumentation, format_report, profiled, profile_summary
 
 # Enable DPI awareness for better text rendering on Windows
 try:
@@ -14,6 +26,12 @@ except:
     pass
 
 class InstagramMessageViewer:
+    ALL_SENDERS = "All senders"
+    # Status shown while a tab's analysis runs
+    TAB_PROGRESS = {"stats": "Computing statistics...", "longest": "Finding the longest messages...",
+                    "search": "Building search index..."}
+    SEARCH_PAGE_SIZE = 50
+    
     def __init__(self, root):
         self.root = root
         self.root.title("Instagram Message Viewer")
@@ -37,9 +55,50 @@ class InstagramMessageViewer:
         )
         self.select_button.pack(side=tk.LEFT, padx=5)
         
+        self.add_button = ttk.Button(
+            self.control_frame,
+            text="Add Files",
+            command=self.add_files
+        )
+        self.add_button.pack(side=tk.LEFT, padx=5)
+        
+        self.export_button = ttk.Button(
+            self.control_frame,
+            text="Open Export",
+            command=self.open_export
+        )
+        self.export_button.pack(side=tk.LEFT, padx=5)
+        
+        self.open_archive_button = ttk.Button(
+            self.control_frame,
+            text="Open Archive",
+            command=self.open_archive
+        )
+        self.open_archive_button.pack(side=tk.LEFT, padx=5)
+        
+        self.save_archive_button = ttk.Button(
+            self.control_frame,
+            text="Save Archive",
+            command=self.save_archive
+        )
+        self.save_archive_button.pack(side=tk.LEFT, padx=5)
+        
         self.files_label = ttk.Label(self.control_frame, text="No files selected", font=default_font)
         self.files_label.pack(side=tk.LEFT, padx=5)
         
+        # Loaded files, so one can be removed again
+        self.files_box = ttk.Combobox(self.control_frame, state="readonly", width=50)
+        self.files_box.pack(side=tk.LEFT, padx=5)
+        self.remove_button = ttk.Button(
+            self.control_frame,
+            text="Remove File",
+            command=self.remove_file
+        )
+        self.remove_button.pack(side=tk.LEFT, padx=5)
+        
+        self.status_label = ttk.Label(self.control_frame, text="", font=default_font)
+        self.status_label.pack(side=tk.RIGHT, padx=5)
+        
         # Create notebook (tabbed interface)
         self.notebook = ttk.Notebook(self.main_frame)
         self.notebook.pack(fill=tk.BOTH, expand=True, pady=10)
@@ -56,6 +115,14 @@ class InstagramMessageViewer:
         self.longest_frame = ttk.Frame(self.notebook, padding=10)
         self.notebook.add(self.longest_frame, text="20 Longest Messages")
         
+        # Tab 4: Search
+        self.search_frame = ttk.Frame(self.notebook, padding=10)
+        self.notebook.add(self.search_frame, text="Search")
+        
+        # Tab 5: Diagnostics
+        self.diagnostics_frame = ttk.Frame(self.notebook, padding=10)
+        self.notebook.add(self.diagnostics_frame, text="Diagnostics")
+        
         # Create text widgets for each tab with scrollbars
         # Statistics tab
         self.stats_scrollbar = ttk.Scrollbar(self.stats_frame)
@@ -69,17 +136,18 @@ class InstagramMessageViewer:
         self.stats_text.pack(fill=tk.BOTH, expand=True)
         self.stats_scrollbar.config(command=self.stats_text.yview)
         
-        # Messages tab
-        self.messages_scrollbar = ttk.Scrollbar(self.messages_frame)
-        self.messages_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
-        self.messages_text = tk.Text(
-            self.messages_frame, 
-            wrap=tk.WORD, 
-            yscrollcommand=self.messages_scrollbar.set,
-            font=default_font
-        )
-        self.messages_text.pack(fill=tk.BOTH, expand=True)
-        self.messages_scrollbar.config(command=self.messages_text.yview)
+        # Messages tab: jump-to-date controls above a virtualized message list
+        self.jump_frame = ttk.Frame(self.messages_frame)
+        self.jump_frame.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(self.jump_frame, text="Jump to date (YYYY-MM-DD):", font=default_font).pack(side=tk.LEFT, padx=5)
+        self.jump_entry = ttk.Entry(self.jump_frame, width=12, font=default_font)
+        self.jump_entry.pack(side=tk.LEFT, padx=5)
+        self.jump_entry.bind("<Return>", lambda event: self.jump_to_date())
+        ttk.Button(self.jump_frame, text="Go", command=self.jump_to_date).pack(side=tk.LEFT, padx=5)
+        
+        self.messages_view = VirtualMessageView(self.messages_frame, font=default_font)
+        self.messages_view.pack(fill=tk.BOTH, expand=True)
+        self.messages_text = self.messages_view.text
         
         # Longest messages tab
         self.longest_scrollbar = ttk.Scrollbar(self.longest_frame)
@@ -93,8 +161,69 @@ class InstagramMessageViewer:
         self.longest_text.pack(fill=tk.BOTH, expand=True)
         self.longest_scrollbar.config(command=self.longest_text.yview)
         
+        # Search tab: query and filters, ranked results, paging controls
+        self.search_controls = ttk.Frame(self.search_frame)
+        self.search_controls.pack(fill=tk.X, pady=(0, 5))
+        ttk.Label(self.search_controls, text="Search:", font=default_font).pack(side=tk.LEFT, padx=5)
+        self.search_entry = ttk.Entry(self.search_controls, width=40, font=default_font)
+        self.search_entry.pack(side=tk.LEFT, padx=5)
+        self.search_entry.bind("<KeyRelease>", lambda event: self._schedule_search())
+        self.search_sender = ttk.Combobox(self.search_controls, state="readonly", width=20,
+                                          values=[self.ALL_SENDERS])
+        self.search_sender.set(self.ALL_SENDERS)
+        self.search_sender.pack(side=tk.LEFT, padx=5)
+        self.search_sender.bind("<<ComboboxSelected>>", lambda event: self.run_search())
+        ttk.Label(self.search_controls, text="From:", font=default_font).pack(side=tk.LEFT, padx=5)
+        self.search_from = ttk.Entry(self.search_controls, width=11, font=default_font)
+        self.search_from.pack(side=tk.LEFT)
+        ttk.Label(self.search_controls, text="To:", font=default_font).pack(side=tk.LEFT, padx=5)
+        self.search_to = ttk.Entry(self.search_controls, width=11, font=default_font)
+        self.search_to.pack(side=tk.LEFT)
+        for entry in (self.search_entry, self.search_from, self.search_to):
+            entry.bind("<Return>", lambda event: self.run_search())
+        ttk.Button(self.search_controls, text="Search", command=self.run_search).pack(side=tk.LEFT, padx=5)
+        
+        self.search_paging = ttk.Frame(self.search_frame)
+        self.search_paging.pack(side=tk.BOTTOM, fill=tk.X, pady=(5, 0))
+        self.search_prev = ttk.Button(self.search_paging, text="< Previous",
+                                      command=lambda: self.run_search(self.search_page - 1))
+        self.search_prev.pack(side=tk.LEFT, padx=5)
+        self.search_next = ttk.Button(self.search_paging, text="Next >",
+                                      command=lambda: self.run_search(self.search_page + 1))
+        self.search_next.pack(side=tk.RIGHT, padx=5)
+        self.search_page_label = ttk.Label(self.search_paging, text="", font=default_font)
+        self.search_page_label.pack()
+        
+        self.search_scrollbar = ttk.Scrollbar(self.search_frame)
+        self.search_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.search_text = tk.Text(
+            self.search_frame,
+            wrap=tk.WORD,
+            yscrollcommand=self.search_scrollbar.set,
+            font=default_font,
+            cursor="hand2"
+        )
+        self.search_text.pack(fill=tk.BOTH, expand=True)
+        self.search_scrollbar.config(command=self.search_text.yview)
+        self.search_text.bind("<Button-1>", self._open_search_hit)
+        
+        # Diagnostics tab: stage timings of the last load, optionally a profile
+        self.profile_next = tk.BooleanVar(value=False)
+        ttk.Checkbutton(self.diagnostics_frame, text="Profile the next load (background thread only)",
+                        variable=self.profile_next).pack(anchor=tk.W, pady=(0, 5))
+        self.diagnostics_scrollbar = ttk.Scrollbar(self.diagnostics_frame)
+        self.diagnostics_scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.diagnostics_text = tk.Text(
+            self.diagnostics_frame,
+            wrap=tk.NONE,
+            yscrollcommand=self.diagnostics_scrollbar.set,
+            font=('Consolas', 10)
+        )
+        self.diagnostics_text.pack(fill=tk.BOTH, expand=True)
+        self.diagnostics_scrollbar.config(command=self.diagnostics_text.yview)
+        
         # Configure text styles for all text widgets
-        for text_widget in [self.stats_text, self.messages_text, self.longest_text]:
+        for text_widget in [self.stats_text, self.messages_text, self.longest_text, self.search_text]:
             text_widget.tag_configure("header", font=('Segoe UI', 14, "bold"))
             text_widget.tag_configure("subheader", font=('Segoe UI', 12, "bold"))
             text_widget.tag_configure("info", font=default_font)
@@ -107,7 +236,48 @@ class InstagramMessageViewer:
         self.sender_tags = {}  # Will map sender names to tag names
         
         self.selected_files = []
-        
+        self.loaded = None  # last "loaded" result, for saving it as an archive
+        
+        # Each tab's analysis runs in the background the first time the tab is
+        # shown, and its result is kept until the loaded file set changes
+        self.loaded_key = None  # identifies the file set the tabs were computed for
+        self.analyses = {}  # tab -> function computing its data, run as a job
+        self.tab_data = {}  # tab -> computed data for the loaded file set
+        self.rendered = set()  # tabs already showing the loaded file set
+        self.current_tab = "stats"
+        self.pending_jobs = 0  # jobs started and not finished; tab analyses wait for them
+        self.instrumentation = None  # stages of the last load and its tab analyses
+        self.load_profile = None
+        
+        # Search state: the index is built the first time the Search tab is shown
+        self.search_index = None
+        self.search_page = 0
+        self.search_hit_lines = {}  # result text line -> message index
+        self._search_after_id = None
+        
+        # Parsed files are cached on disk so re-opening an export is fast
+        self.parse_cache = ParseCache()
+        
+        # Per-file results of the loaded files, merged incrementally
+        self.session = AnalysisSession(cache=self.parse_cache)
+        
+        # Loading and analysis run in the background so the window stays responsive
+        self.pipeline = LoadPipeline(self.root, self._on_pipeline_event)
+        # Searches get their own worker: a new query replaces the previous one
+        # without cancelling a load, and typing never waits on a search
+        self.search_pipeline = LoadPipeline(self.root, self._on_search_event)
+        self.root.protocol("WM_DELETE_WINDOW", self.close)
+        
+        self.tab_keys = {str(self.stats_frame): "stats", str(self.messages_frame): "messages",
+                         str(self.longest_frame): "longest", str(self.search_frame): "search",
+                         str(self.diagnostics_frame): "diagnostics"}
+        self.notebook.bind("<<NotebookTabChanged>>", self._on_tab_changed)
+        
+    def close(self):
+        self.pipeline.shutdown()
+        self.search_pipeline.shutdown()
+        self.root.destroy()
+    
     def select_files(self):
         """Open file dialog to select multiple JSON files."""
         file_paths = filedialog.askopenfilenames(
@@ -122,42 +292,348 @@ class InstagramMessageViewer:
         self.files_label.config(text=f"{len(self.selected_files)} files selected")
         self.display_messages()
     
+    def add_files(self):
+        """Add more JSON files to the loaded set without reprocessing the others."""
+        file_paths = filedialog.askopenfilenames(
+            title="Add Instagram JSON Files",
+            filetypes=[("JSON files", "*.json"), ("All files", "*.*")]
+        )
+        
+        if not file_paths:
+            return
+        
+        self.selected_files = list(dict.fromkeys(self.selected_files + list(file_paths)))
+        self._start_update()
+    
+    def remove_file(self):
+        """Remove the file chosen in the files box from the loaded set."""
+        file_path = self.files_box.get()
+        if file_path not in self.selected_files:
+            return
+        
+        self.selected_files.remove(file_path)
+        self._start_update()
+    
+    def open_archive(self):
+        """Open a message archive; it is memory-mapped rather than parsed."""
+        archive_path = filedialog.askopenfilename(
+            title="Open Message Archive",
+            filetypes=[("Message archives", f"*{ARCHIVE_SUFFIX}"), ("All files", "*.*")]
+        )
+        if not archive_path:
+            return
+        
+        # An archive is a fixed set of messages; added files start over
+        self.selected_files = []
+        self.session = AnalysisSession(cache=self.parse_cache)
+        profile = self.profile_next.get()
+        self.profile_next.set(False)
+        self._start_job(functools.partial(self._load_archive, archive_path, profile), replace=True)
+    
+    def save_archive(self):
+        """Save the loaded conversation as a message archive for fast reopening."""
+        if self.loaded is None:
+            messagebox.showinfo("Save Archive", "Load a conversation first")
+            return
+        archive_path = filedialog.asksaveasfilename(
+            title="Save Message Archive",
+            defaultextension=ARCHIVE_SUFFIX,
+            filetypes=[("Message archives", f"*{ARCHIVE_SUFFIX}")]
+        )
+        if archive_path:
+            self._start_job(functools.partial(self._save_archive, archive_path, self.loaded))
+    
+    def open_export(self):
+        """Catalog the conversations of a full data export in the background."""
+        root_path = filedialog.askdirectory(title="Select the root of an Instagram data export")
+        if not root_path:
+            return
+        self._start_job(functools.partial(self._build_catalog, root_path))
+    
+    @staticmethod
+    def _build_catalog(root_path, report):
+        """Background job: scan every conversation of an export into a catalog."""
+        def conversation_done(entry, done, total):
+            report("progress", f"Scanned {done}/{total} conversations")
+        
+        entries = build_catalog(root_path, progress=conversation_done)
+        report("catalog", (root_path, entries))
+        report("progress", f"Found {len(entries)} conversations")
+    
+    def _show_catalog(self, root_path, entries):
+        if not entries:
+            messagebox.showinfo("Open Export", f"No conversations found in {root_path}")
+            return
+        ConversationCatalog(self.root, root_path, entries, self.open_conversation)
+    
+    def open_conversation(self, entry):
+        """Load a conversation picked from the export catalog."""
+        self.selected_files = list(entry["files"])
+        self.files_label.config(text=f"{entry['title']}: {len(self.selected_files)} files selected")
+        self.display_messages()
+    
     def display_messages(self):
-        """Display messages from selected JSON files."""
-        # Clear all text widgets
-        self.stats_text.delete(1.0, tk.END)
-        self.messages_text.delete(1.0, tk.END)
-        self.longest_text.delete(1.0, tk.END)
-        
-        all_messages = []
-        all_participants = set()
-        file_info = []
-        
-        # Process each selected file
-        for file_path in self.selected_files:
-            result = parse_instagram_json(file_path)
-            messages = result["messages"]
-            participants = result["participants"]
+        """Load the selected JSON files in the background."""
+        # A new selection starts a fresh session and cancels any job still
+        # running or queued for the old one. The tabs keep showing the
+        # previous files until the new ones are loaded.
+        self.session = AnalysisSession(cache=self.parse_cache)
+        self._start_update(replace=True)
+    
+    def _start_update(self, replace=False):
+        """Bring the session in line with the selected files in the background.
+        
+        Updates queue behind the running job rather than cancelling it, so
+        adding or removing a file mid-load never loses the load. Profiled if
+        that was asked for.
+        """
+        profile = self.profile_next.get()
+        self.profile_next.set(False)  # a profile covers a single load
+        self._start_job(functools.partial(self._update_session, self.session,
+                                          list(self.selected_files), profile), replace)
+    
+    def _start_job(self, job, replace=False):
+        """Queue a background job; replace=True (a new file set) cancels the others."""
+        if replace:
+            self.pending_jobs = 0
+        self.pending_jobs += 1
+        self.pipeline.start(job, replace)
+    
+    @staticmethod
+    def _update_session(session, file_paths, profile, report):
+        """Background job: load `file_paths` into the session, then report the loaded messages.
+        
+        Runs on the pipeline's worker thread and must not touch Tk; results
+        are handed back through report(). Files the session holds but
+        file_paths doesn't are removed and only the missing files are parsed;
+        everything else is merged from the session's per-file results. The
+        analyses are left to the tabs that show them.
+        """
+        instrumentation = Instrumentation()
+        add_paths = [p for p in file_paths if p not in session.paths]
+        parsed = 0
+        def file_done(file_path, result):
+            nonlocal parsed
+            parsed += 1
+            report("progress", f"Parsed {os.path.basename(file_path)} ({parsed}/{len(add_paths)} files)")
+        
+        with profiled(profile) as profiler:
+            # Files are parsed in parallel and merged in newest-first
+            for path in [p for p in session.paths if p not in file_paths]:
+                session.remove_file(path, instrumentation)
+            if add_paths:
+                session.add_files(add_paths, progress=file_done, instrumentation=instrumentation)
             
-            all_messages.extend(messages)
-            all_participants.update(participants)
+            # Stats and word usage come from the merged per-file aggregates
+            InstagramMessageViewer._report_loaded(
+                InstagramMessageViewer._file_set_key(session.paths),
+                session.messages, session.participants, session.file_info(),
+                functools.partial(session.summary, instrumentation), instrumentation, report)
+        
+        report("diagnostics", (instrumentation, profile_summary(profiler) if profiler is not None else None))
+        report("progress", f"Loaded {len(session.messages)} messages")
+    
+    @staticmethod
+    def _load_archive(archive_path, profile, report):
+        """Background job: map a message archive; tabs analyze it straight off the file."""
+        instrumentation = Instrumentation()
+        with profiled(profile) as profiler:
+            with instrumentation.stage("open_archive", file=archive_path) as counts:
+                archive = open_archive(archive_path)
+                counts["items"] = len(archive)
+            files = archive.files or [{"path": archive_path, "messages": len(archive)}]
             
-            file_name = os.path.basename(file_path)
-            file_info.append(f"{file_name}: {len(messages)} messages")
+            def summarize():
+                with instrumentation.stage("aggregate", len(archive)):
+                    aggregator = MessageAnalyzer.aggregate(archive)
+                return summarize_aggregate(aggregator)
+            InstagramMessageViewer._report_loaded(
+                InstagramMessageViewer._file_set_key([archive_path]),
+                archive, archive.participants, files, summarize, instrumentation, report)
+        
+        report("diagnostics", (instrumentation, profile_summary(profiler) if profiler is not None else None))
+        report("progress", f"Opened {len(archive)} messages from {os.path.basename(archive_path)}")
+    
+    @staticmethod
+    def _file_set_key(paths):
+        """Identify loaded files by path, size and modification time."""
+        key = []
+        for path in paths:
+            try:
+                status = os.stat(path)
+                key.append((path, status.st_size, status.st_mtime_ns))
+            except OSError:
+                key.append((path, None, None))
+        return tuple(key)
+    
+    @staticmethod
+    def _report_loaded(key, all_messages, participants, files, summarize, instrumentation, report):
+        """Report the loaded messages along with the analysis behind each tab.
+        
+        Nothing is analyzed here: the viewer runs a tab's analysis as its own
+        job the first time the tab is shown for this file set.
+        """
+        def stats():
+            with instrumentation.stage("summarize"):
+                analysis = summarize()
+            with instrumentation.stage("timeline", len(all_messages)):
+                analysis["timeline"] = analyze_timeline(all_messages)
+            return analysis
+        
+        def longest():
+            with instrumentation.stage("longest", len(all_messages)):
+                return MessageAnalyzer.find_longest_messages(all_messages, 20)
+        
+        def search_index():
+            with instrumentation.stage("search_index", len(all_messages)):
+                return SearchIndex(all_messages)
+        
+        report("loaded", {
+            "key": key,
+            "messages": all_messages,
+            "participants": participants,
+            "files": files,
+            "analyses": {"stats": stats, "longest": longest, "search": search_index},
+            "instrumentation": instrumentation
+        })
+    
+    @staticmethod
+    def _compute_tab(tab, analysis, instrumentation, status, report):
+        """Background job: run one tab's analysis for the loaded file set."""
+        report("progress", InstagramMessageViewer.TAB_PROGRESS[tab])
+        report("tab_data", (tab, analysis()))
+        report("diagnostics", (instrumentation, None))
+        report("progress", status)
+    
+    @staticmethod
+    def _save_archive(archive_path, loaded, report):
+        """Background job: write the loaded conversation to a message archive."""
+        report("progress", f"Saving {os.path.basename(archive_path)}...")
+        count = write_archive(archive_path, loaded["messages"], loaded["participants"], loaded["files"])
+        report("progress", f"Saved {count} messages to {os.path.basename(archive_path)}")
+    
+    def _on_pipeline_event(self, kind, payload):
+        """Handle a report from the background job on the Tk thread."""
+        if kind == "started":
+            self.status_label.config(text="Loading...")
+        elif kind == "finished":
+            self.pending_jobs -= 1
+            # The tab may have been switched while the job ran
+            self._show_current_tab()
+        elif kind == "progress":
+            self.status_label.config(text=payload)
+        elif kind == "loaded":
+            self._show_loaded(payload)
+        elif kind == "tab_data":
+            tab, data = payload
+            self.tab_data[tab] = data
+            if tab == self.current_tab:
+                self._render_tab(tab)
+        elif kind == "catalog":
+            self._show_catalog(*payload)
+        elif kind == "diagnostics":
+            self._render_diagnostics(*payload)
+        elif kind == "error":
+            self.pending_jobs -= 1
+            self.status_label.config(text="Loading failed")
+            messagebox.showerror("Loading failed", str(payload))
+    
+    def _render_diagnostics(self, instrumentation, profile):
+        """Show the stage timings of the last load and its tab analyses."""
+        if profile is not None:
+            self.load_profile = profile
+        self.diagnostics_text.delete(1.0, tk.END)
+        self.diagnostics_text.insert(tk.END, format_report(instrumentation.report()) + "\n")
+        if self.loaded is not None:
+            failures = sum(f.get('decode_failures', 0) for f in self.loaded["files"])
+            self.diagnostics_text.insert(tk.END, f"Contents left undecoded: {failures}\n")
+        if self.load_profile is not None:
+            self.diagnostics_text.insert(tk.END, "\n" + self.load_profile)
+    
+    def _show_loaded(self, result):
+        """Take over a loaded file set; tabs are filled when they are shown."""
+        start = time.perf_counter()
+        if result["key"] != self.loaded_key:
+            # Different files: drop every tab's results and recompute on demand
+            self.tab_data = {}
+            self.rendered = set()
+            self.stats_text.delete(1.0, tk.END)
+            self.messages_view.clear()
+            self.longest_text.delete(1.0, tk.END)
+            self.search_text.delete(1.0, tk.END)
+            self.search_index = None
+            self.search_sender.config(values=[self.ALL_SENDERS] + sorted(set(result["participants"])))
+            self.search_sender.set(self.ALL_SENDERS)
+        self.loaded = result
+        self.loaded_key = result["key"]
+        self.analyses = result["analyses"]
+        self.instrumentation = result["instrumentation"]
+        self.load_profile = None
+        paths = [f['path'] for f in result["files"]]
+        self.files_label.config(text=f"{len(paths)} files loaded")
+        self.files_box.config(values=paths)
+        self.files_box.set(paths[-1] if paths else "")
         
         # Create sender tags dynamically based on participants found
         self.sender_tags = {}
-        for i, participant in enumerate(sorted(all_participants)):
+        for i, participant in enumerate(sorted(set(result["participants"]))):
             color_index = i % len(self.sender_colors)
             tag_name = f"sender_{i}"
             self.sender_tags[participant] = tag_name
             # Apply tags to all text widgets
-            for text_widget in [self.stats_text, self.messages_text, self.longest_text]:
+            for text_widget in [self.stats_text, self.messages_text, self.longest_text, self.search_text]:
                 text_widget.tag_configure(tag_name, 
                                         font=('Segoe UI', 11, "bold"), 
                                         foreground=self.sender_colors[color_index])
+        self.instrumentation.record("tk_loaded", time.perf_counter() - start)
+    
+    def _on_tab_changed(self, event=None):
+        self.current_tab = self.tab_keys.get(self.notebook.select())
+        self._show_current_tab()
+    
+    def _show_current_tab(self):
+        """Fill the open tab, running its analysis in the background first if needed."""
+        tab = self.current_tab
+        if self.loaded is None or tab in self.rendered:
+            return
+        if tab in self.analyses and tab not in self.tab_data:
+            # Only once the queued jobs are done, so the analysis is of the
+            # files they load; "finished" brings us back here
+            if not self.pending_jobs:
+                self._start_job(functools.partial(self._compute_tab, tab, self.analyses[tab],
+                                                  self.instrumentation, self.status_label.cget("text")))
+            return
+        self._render_tab(tab)
+    
+    def _render_tab(self, tab):
+        """Fill a tab from the loaded messages and its analysis, once per file set."""
+        start = time.perf_counter()
+        if tab == "stats":
+            self._render_overview()
+            self._render_stats(self.tab_data["stats"])
+            self._render_timeline(self.tab_data["stats"]["timeline"])
+        elif tab == "messages":
+            # Messages are already merged newest-first; the view only renders
+            # the rows around the viewport
+            self.messages_view.set_messages(self.loaded["messages"], self.sender_tags)
+        elif tab == "longest":
+            self._render_longest(self.tab_data["longest"])
+        elif tab == "search":
+            self.search_index = self.tab_data["search"]
+            self.run_search()
+        else:
+            return
+        self.rendered.add(tab)
+        self.instrumentation.record(f"tk_{tab}", time.perf_counter() - start)
+    
+    def _render_overview(self):
+        """Write the participants and files at the top of the Statistics tab."""
+        all_participants = set(self.loaded["participants"])
+        file_info = [f"{os.path.basename(f['path'])}: {f['messages']} messages"
+                     + (f", {f['duplicates']} duplicates skipped" if f.get('duplicates') else "")
+                     + (f", {f['decode_failures']} left undecoded" if f.get('decode_failures') else "")
+                     for f in self.loaded["files"]]
         
-        # --- STATISTICS TAB ---
         self.stats_text.insert(tk.END, "CHAT INFORMATION\n", "header")
         self.stats_text.insert(tk.END, "----------------\n\n", "header")
         
@@ -174,9 +650,10 @@ class InstagramMessageViewer:
             for info in file_info:
                 self.stats_text.insert(tk.END, f"• {info}\n", "info")
             self.stats_text.insert(tk.END, "\n")
-        
-        # Get message statistics using MessageAnalyzer
-        stats = MessageAnalyzer.calculate_stats(all_messages)
+    
+    def _render_stats(self, analysis):
+        """Append message and word usage statistics to the Statistics tab."""
+        stats = analysis["stats"]
         
         # Show message statistics
         self.stats_text.insert(tk.END, "Message Statistics:\n", "subheader")
@@ -195,8 +672,8 @@ class InstagramMessageViewer:
         # Top words per participant (all words)
         self.stats_text.insert(tk.END, "Most Common Words by Participant:\n", "subheader")
 
-        # Get word usage analysis (min length 1)
-        word_usage = MessageAnalyzer.analyze_word_usage_by_sender(all_messages, top_n=50, min_length=1)
+        # Word usage analysis (min length 1)
+        word_usage = analysis["word_usage"]
 
         # Display word usage for each sender
         for sender, words in word_usage.items():
@@ -216,7 +693,7 @@ class InstagramMessageViewer:
 
         # Longer words per participant (min length 4)
         self.stats_text.insert(tk.END, "\n")
-        word_usage_longer = MessageAnalyzer.analyze_word_usage_by_sender(all_messages, top_n=30, min_length=4)
+        word_usage_longer = analysis["word_usage_longer"]
 
         # Display longer word usage for each sender
         for sender, words in word_usage_longer.items():
@@ -238,7 +715,7 @@ class InstagramMessageViewer:
         self.stats_text.insert(tk.END, "\nMost Common Words Overall:\n", "subheader")
 
         # All words (min length 1)
-        all_words_short = MessageAnalyzer.find_most_common_words(all_messages, sender=None, top_n=50, min_length=1)
+        all_words_short = analysis["all_words_short"]
         if all_words_short:
             self.stats_text.insert(tk.END, "• Overall most used words (all lengths):\n", "subheader")
             word_list = ', '.join([f"{word} ({count})" for word, count in all_words_short])
@@ -247,18 +724,68 @@ class InstagramMessageViewer:
             self.stats_text.insert(tk.END, "  (No words found)\n\n", "info")
 
         # Longer words (min length 4)
-        all_words_long = MessageAnalyzer.find_most_common_words(all_messages, sender=None, top_n=50, min_length=4)
+        all_words_long = analysis["all_words_long"]
         if all_words_long:
             self.stats_text.insert(tk.END, "• Overall most used words (4+ characters):\n", "subheader")
             word_list = ', '.join([f"{word} ({count})" for word, count in all_words_long])
             self.stats_text.insert(tk.END, f"  {word_list}\n", "info")
         else:
             self.stats_text.insert(tk.END, "  (No words found)\n", "info")
-        
-        # --- LONGEST MESSAGES TAB ---
-        # Find 20 longest messages using MessageAnalyzer
-        longest_messages = MessageAnalyzer.find_longest_messages(all_messages, 20)
-        
+    
+    @staticmethod
+    def _sparkline(counts):
+        """Draw counts as a row of block characters scaled to the largest."""
+        blocks = " ▁▂▃▄▅▆▇█"
+        peak = max(counts) or 1
+        return "".join(blocks[-(-count * (len(blocks) - 1) // peak)] for count in counts)
+    
+    def _render_timeline(self, timeline):
+        """Append the activity timeline section to the Statistics tab."""
+        self.stats_text.insert(tk.END, "\nACTIVITY TIMELINE\n", "header")
+        self.stats_text.insert(tk.END, "-----------------\n\n", "header")
+        
+        streak = timeline["longest_streak"]
+        self.stats_text.insert(tk.END, f"• Active days: {timeline['active_days']}\n", "info")
+        if streak:
+            self.stats_text.insert(tk.END, f"• Longest streak: {streak['days']} days "
+                                           f"({streak['start']} to {streak['end']})\n", "info")
+        
+        # Per participant: when they write and how fast they reply
+        self.stats_text.insert(tk.END, "\nActivity by Participant:\n", "subheader")
+        for sender, hours in timeline["hourly"].items():
+            tag = self.sender_tags.get(sender, "info")
+            weekdays = timeline["weekday"][sender]
+            busiest_hour = hours.index(max(hours))
+            busiest_day = WEEKDAYS[weekdays.index(max(weekdays))]
+            self.stats_text.insert(tk.END, f"\n• {sender}: most active around {busiest_hour:02d}:00, "
+                                           f"busiest on {busiest_day}s\n", tag)
+            self.stats_text.insert(tk.END, f"  Hours 0-23: {self._sparkline(hours)}\n", "info")
+            self.stats_text.insert(tk.END, f"  Mon-Sun: {self._sparkline(weekdays)}  "
+                                           f"({', '.join(str(c) for c in weekdays)})\n", "info")
+            response = timeline["response_times"].get(sender)
+            if response:
+                self.stats_text.insert(tk.END, f"  Median reply time: {format_duration(response['median_ms'])} "
+                                               f"over {response['count']} replies\n", "info")
+        
+        # Messages per month for the whole chat
+        if timeline["months"]:
+            totals = [sum(counts) for counts in zip(*timeline["monthly"].values())]
+            self.stats_text.insert(tk.END, "\nMessages per Month:\n", "subheader")
+            self.stats_text.insert(tk.END, f"  {timeline['months'][0]} to {timeline['months'][-1]}: "
+                                           f"{self._sparkline(totals)}\n", "info")
+            busiest = totals.index(max(totals))
+            self.stats_text.insert(tk.END, f"  Busiest month: {timeline['months'][busiest]} "
+                                           f"({totals[busiest]} messages)\n", "info")
+        
+        if timeline["gaps"]:
+            self.stats_text.insert(tk.END, "\nLongest Silences:\n", "subheader")
+            for gap in timeline["gaps"]:
+                self.stats_text.insert(tk.END, f"• {format_duration(gap['milliseconds'])}: "
+                                               f"{MessageAnalyzer.format_timestamp(gap['start'])} to "
+                                               f"{MessageAnalyzer.format_timestamp(gap['end'])}\n", "info")
+    
+    def _render_longest(self, longest_messages):
+        """Fill the Longest Messages tab."""
         self.longest_text.insert(tk.END, "20 LONGEST MESSAGES\n", "header")
         self.longest_text.insert(tk.END, "-------------------\n\n", "header")
         
@@ -283,34 +810,121 @@ class InstagramMessageViewer:
                 self.longest_text.insert(tk.END, f"{preview}\n\n", "info")
             else:
                 self.longest_text.insert(tk.END, f"{content}\n\n", "info")
+    
+    def jump_to_date(self):
+        """Scroll the Messages tab to the newest message on the entered date."""
+        try:
+            day = datetime.strptime(self.jump_entry.get().strip(), "%Y-%m-%d")
+        except ValueError:
+            messagebox.showerror("Invalid date", "Enter a date as YYYY-MM-DD.")
+            return
+        end_of_day = (day + timedelta(days=1)).timestamp() * 1000 - 1
+        self.messages_view.jump_to_timestamp(end_of_day)
+    
+    def _schedule_search(self):
+        """Search as the user types, once typing pauses briefly."""
+        if self._search_after_id is not None:
+            self.root.after_cancel(self._search_after_id)
+        self._search_after_id = self.root.after(250, self.run_search)
+    
+    @staticmethod
+    def _parse_day(text, end_of_day=False):
+        """Parse a YYYY-MM-DD filter into a millisecond timestamp (None if blank)."""
+        text = text.strip()
+        if not text:
+            return None
+        day = datetime.strptime(text, "%Y-%m-%d")
+        if end_of_day:
+            return (day + timedelta(days=1)).timestamp() * 1000 - 1
+        return day.timestamp() * 1000
+    
+    def run_search(self, page=0):
+        """Search for one page of ranked hits for the current query and filters.
+        
+        The search runs on the search pipeline; its results are shown by
+        _show_search_results.
+        """
+        self._search_after_id = None
+        query = self.search_entry.get()
+        if not query.strip():
+            self.search_pipeline.cancel()
+            self.search_text.delete(1.0, tk.END)
+            self.search_hit_lines = {}
+            self.search_page_label.config(text="")
+            return
+        if self.search_index is None:
+            self.search_text.delete(1.0, tk.END)
+            self.search_hit_lines = {}
+            self.search_text.insert(tk.END, "The search index is still being built...\n", "info")
+            return
+        try:
+            start = self._parse_day(self.search_from.get())
+            end = self._parse_day(self.search_to.get(), end_of_day=True)
+        except ValueError:
+            self.search_text.delete(1.0, tk.END)
+            self.search_hit_lines = {}
+            self.search_text.insert(tk.END, "Enter dates as YYYY-MM-DD.\n", "info")
+            return
+        sender = self.search_sender.get()
+        sender = None if sender == self.ALL_SENDERS else sender
         
-        # --- MESSAGES TAB ---
-        self.messages_text.insert(tk.END, "MESSAGES (Chronological Order)\n", "header")
-        self.messages_text.insert(tk.END, "------------------------------\n\n", "header")
-        
-        # Sort messages by timestamp (newest first) using MessageAnalyzer
-        sorted_messages = MessageAnalyzer.sort_by_timestamp(all_messages, reverse=True)
-        
-        # Display all messages in chronological order
-        for message in sorted_messages:
+        self.search_page_label.config(text="Searching...")
+        self.search_pipeline.start(functools.partial(
+            self._search, self.search_index, query, sender, start, end, page, self.SEARCH_PAGE_SIZE),
+            replace=True)
+    
+    @staticmethod
+    def _search(index, query, sender, start, end, page, page_size, report):
+        """Background job: run one search against a (read-only) search index."""
+        report("search_results", (index, index.search(query, sender, start, end, page, page_size)))
+    
+    def _on_search_event(self, kind, payload):
+        if kind == "search_results":
+            index, results = payload
+            # Results from the index of a previous load are stale
+            if index is self.search_index:
+                self._show_search_results(results)
+        elif kind == "error":
+            self.search_page_label.config(text="Search failed")
+            messagebox.showerror("Search failed", str(payload))
+    
+    def _show_search_results(self, results):
+        """Show a page of hits returned by SearchIndex.search."""
+        self.search_text.delete(1.0, tk.END)
+        self.search_hit_lines = {}
+        pages = max(1, -(-results["total"] // self.SEARCH_PAGE_SIZE))
+        self.search_page = results["page"]
+        self.search_page_label.config(
+            text=f"{results['total']} matches - page {self.search_page + 1} of {pages}")
+        
+        for prefix in results["truncated"]:
+            self.search_text.insert(
+                tk.END, f"Only the first {MAX_PREFIX_EXPANSIONS} words starting with "
+                        f"\"{prefix}\" were searched; type more of the word to narrow it down.\n\n", "info")
+        if not results["hits"]:
+            self.search_text.insert(tk.END, "No matches found.\n", "info")
+            return
+        for hit in results["hits"]:
+            message = hit["message"]
+            line = int(self.search_text.index("end-1c").split(".")[0])
+            self.search_hit_lines[line] = hit["index"]
             timestamp = MessageAnalyzer.format_timestamp(message.get('timestamp', 0))
-            self.messages_text.insert(tk.END, f"[{timestamp}]\t", "time")
-            
-            # Use different colors for different senders dynamically
-            sender = message['sender_name']
-            tag = self.sender_tags.get(sender, "info")
-            
-            # Use tab for alignment
-            self.messages_text.insert(tk.END, f"{sender}:\t", tag)
-            
-            # Insert content after the tab stop, handling empty messages
-            content = message.get('content', '')
-            
-            # For special message types, use a distinct style
-            if content in ["[Photo]", "[Video]", "[GIF]", "[File]", "[Audio]", "[Empty message]"]:
-                self.messages_text.insert(tk.END, f"{content}\n\n", "media")
-            else:
-                self.messages_text.insert(tk.END, f"{content}\n\n")
+            # Keep each hit on one line so clicks map back to it
+            content = message['content'].replace("\n", " ")
+            snippet = content if len(content) <= 200 else content[:197] + "..."
+            self.search_text.insert(tk.END,
+                                    f"[{timestamp}]\t", "time",
+                                    f"{message['sender_name']}:\t", self.sender_tags.get(message['sender_name'], "info"),
+                                    f"{snippet}\n", "info")
+    
+    def _open_search_hit(self, event):
+        """Show the clicked search hit in context on the Messages tab."""
+        line = int(self.search_text.index(f"@{event.x},{event.y}").split(".")[0])
+        index = self.search_hit_lines.get(line)
+        if index is not None:
+            self.notebook.select(self.messages_frame)
+            self._on_tab_changed()  # fill the Messages tab before scrolling it
+            self.messages_view.show_message(index)
 
 def main():
     root = tk.Tk()
@@ -0,0 +1,157 @@
+import json
+import mmap
+import os
+import struct
+import sys
+from array import array
+
+from message_store import ColumnarMessages, MessageStore
+
+ARCHIVE_SUFFIX = ".igarchive"
+ARCHIVE_VERSION = 1
+
+_MAGIC = b"IGMSGARC"
+_PREAMBLE = struct.Struct("<8sQ")  # magic, header length
+_ALIGNMENT = 8
+
+# Column name -> array typecode, in file order. The content blob follows.
+_COLUMNS = [("timestamps", 'q'), ("offsets", 'Q'), ("sender_ids", 'I'),
+            ("lengths", 'I'), ("kinds", 'B')]
+
+def _padding(position):
+    return -position % _ALIGNMENT
+
+def write_archive(path, messages, participants=(), files=()):
+    """Write messages to a columnar archive file.
+
+    Args:
+        path: Archive file to create (replaced atomically if it exists)
+        messages: Message dictionaries, a MessageStore or another archive,
+            in the order they should be stored (newest first for the viewer)
+        participants: Participant names to keep with the messages
+        files: Optional {"path", "messages"} entries describing the sources
+
+    Layout: an 8-byte magic, the header length, a JSON header, then every
+    column and the UTF-8 content blob, each aligned to 8 bytes so readers can
+    cast them in place. Columns are stored little-endian.
+    """
+    store = messages if isinstance(messages, ColumnarMessages) else MessageStore(messages)
+    columns = []
+    for name, typecode in _COLUMNS:
+        # Arrays and mapped columns of the right type are written as they are
+        column = memoryview(getattr(store, name))
+        if column.format != typecode or sys.byteorder != "little":
+            column = array(typecode, column)
+            if sys.byteorder != "little":
+                column.byteswap()
+            column = memoryview(column)
+        columns.append((name, column))
+    columns.append(("content", memoryview(store.buffer)))
+
+    # Section positions are relative to the end of the header
+    sections = {}
+    position = 0
+    for name, column in columns:
+        sections[name] = [position, column.nbytes]
+        position += column.nbytes + _padding(column.nbytes)
+    header = json.dumps({
+        "version": ARCHIVE_VERSION,
+        "count": len(store),
+        "senders": list(store.senders),
+        "participants": list(participants),
+        "files": list(files),
+        "sections": sections
+    }, ensure_ascii=False).encode('utf-8')
+    header += b" " * _padding(_PREAMBLE.size + len(header))
+
+    # Written next to the target so the final rename is atomic
+    temp_path = f"{path}.{os.getpid()}.tmp"
+    try:
+        with open(temp_path, 'wb') as file:
+            file.write(_PREAMBLE.pack(_MAGIC, len(header)))
+            file.write(header)
+            for name, column in columns:
+                file.write(column)
+                file.write(b"\0" * _padding(sections[name][1]))
+        os.replace(temp_path, path)
+    except BaseException:
+        try:
+            os.unlink(temp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    return len(store)
+
+class MappedArchive(ColumnarMessages):
+    """Read-only view of an archive file through a memory map.
+
+    The columns are memoryviews cast straight onto the mapped file, so
+    opening an archive reads only its header and pages are loaded on demand.
+    Works wherever a MessageStore does: indexing gives message dictionaries
+    and MessageAnalyzer uses the columns directly. Call close() (or use it
+    as a context manager) to unmap it once nothing refers to its columns.
+    """
+
+    def __init__(self, path):
+        if sys.byteorder != "little":
+            raise ValueError("Archives can only be mapped on little-endian machines")
+        self.path = path
+        with open(path, 'rb') as file:
+            size = os.fstat(file.fileno()).st_size
+            if size < _PREAMBLE.size:
+                raise ValueError(f"{path} is not a message archive")
+            self._map = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        try:
+            magic, header_length = _PREAMBLE.unpack_from(self._map)
+            if magic != _MAGIC:
+                raise ValueError(f"{path} is not a message archive")
+            header = json.loads(self._map[_PREAMBLE.size:_PREAMBLE.size + header_length])
+            if header.get("version") != ARCHIVE_VERSION:
+                raise ValueError(f"{path} has unsupported archive version {header.get('version')}")
+            self.senders = header["senders"]
+            self.participants = header["participants"]
+            self.files = header["files"]
+
+            base = _PREAMBLE.size + header_length
+            self._views = [memoryview(self._map)]
+            for name, typecode in _COLUMNS + [("content", 'B')]:
+                start, length = header["sections"][name]
+                if base + start + length > size:
+                    raise ValueError(f"{path} is truncated")
+                section = self._views[0][base + start:base + start + length]
+                self._views.append(section)
+                if name != "content":
+                    section = section.cast(typecode)
+                    self._views.append(section)
+                setattr(self, "buffer" if name == "content" else name, section)
+        except BaseException:
+            self.close()
+            raise
+        if len(self.offsets) != header["count"] + 1:
+            self.close()
+            raise ValueError(f"{path} is corrupt")
+
+    def close(self):
+        """Release the column views and unmap the file."""
+        for view in reversed(getattr(self, "_views", [])):
+            view.release()
+        self._views = []
+        self._map.close()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc_info):
+        self.close()
+
+def open_archive(path):
+    """Memory-map an archive written by write_archive."""
+    return MappedArchive(path)
+
+def is_archive(path):
+    """Return True if the file starts with the archive magic."""
+    try:
+        with open(path, 'rb') as file:
+            return file.read(len(_MAGIC)) == _MAGIC
+    except OSError:
+        return False
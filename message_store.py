@@ -0,0 +1,128 @@
+from array import array
+from enum import IntEnum
+
+class MediaKind(IntEnum):
+    """Kind of a message's content; media placeholders are stored as codes."""
+    TEXT = 0
+    PHOTO = 1
+    VIDEO = 2
+    GIF = 3
+    FILE = 4
+    AUDIO = 5
+    SHARE = 6
+    EMPTY = 7
+
+# Placeholder text produced by the parser for each media kind
+MEDIA_LABELS = {
+    MediaKind.PHOTO: "[Photo]",
+    MediaKind.VIDEO: "[Video]",
+    MediaKind.GIF: "[GIF]",
+    MediaKind.FILE: "[File]",
+    MediaKind.AUDIO: "[Audio]",
+    MediaKind.EMPTY: "[Empty message]",
+}
+_LABEL_KINDS = {label: kind for kind, label in MEDIA_LABELS.items()}
+_SHARE_PREFIX = "[Shared: "
+
+def classify_content(content):
+    """Split parser content into (MediaKind, text stored in the content buffer)."""
+    kind = _LABEL_KINDS.get(content)
+    if kind is not None:
+        return kind, ""
+    if content.startswith(_SHARE_PREFIX) and content.endswith("]"):
+        return MediaKind.SHARE, content[len(_SHARE_PREFIX):-1]
+    return MediaKind.TEXT, content
+
+class ColumnarMessages:
+    """Read access shared by the columnar message containers.
+
+    Subclasses provide `senders` (sender ID -> name) and the sender_ids,
+    timestamps, lengths, kinds and offsets columns as indexable sequences of
+    integers, plus a `buffer` holding the UTF-8 text of every message.
+    Indexing and iteration produce the familiar
+    {'sender_name', 'content', 'timestamp'} dictionaries.
+    """
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def __getitem__(self, index):
+        if index < 0:
+            index += len(self)
+        if not 0 <= index < len(self):
+            raise IndexError("message index out of range")
+        return {
+            'sender_name': self.senders[self.sender_ids[index]],
+            'content': self.content(index),
+            'timestamp': self.timestamps[index]
+        }
+
+    def __iter__(self):
+        for index in range(len(self)):
+            yield self[index]
+
+    def content(self, index):
+        """Return the content string of a message as the parser produced it."""
+        kind = self.kinds[index]
+        if kind == MediaKind.TEXT or kind == MediaKind.SHARE:
+            text = str(self.buffer[self.offsets[index]:self.offsets[index + 1]], 'utf-8', 'surrogatepass')
+            return text if kind == MediaKind.TEXT else f"{_SHARE_PREFIX}{text}]"
+        return MEDIA_LABELS[kind]
+
+    def take(self, indices):
+        """Return a new MessageStore holding the messages at the given indices, in that order."""
+        result = MessageStore()
+        result.senders = list(self.senders)
+        result._sender_index = {name: i for i, name in enumerate(result.senders)}
+        for index in indices:
+            result.sender_ids.append(self.sender_ids[index])
+            result.timestamps.append(self.timestamps[index])
+            result.lengths.append(self.lengths[index])
+            result.kinds.append(self.kinds[index])
+            result.buffer += self.buffer[self.offsets[index]:self.offsets[index + 1]]
+            result.offsets.append(len(result.buffer))
+        return result
+
+class MessageStore(ColumnarMessages):
+    """Compact columnar container for parsed messages.
+
+    Sender names are interned to integer IDs, timestamps, content lengths and
+    media kinds live in typed arrays, and message text is kept UTF-8 encoded
+    in one shared buffer.
+    """
+
+    def __init__(self, messages=()):
+        self.senders = []             # sender ID -> sender name
+        self._sender_index = {}       # sender name -> sender ID
+        self.sender_ids = array('I')
+        self.timestamps = array('q')
+        self.lengths = array('I')     # character length of each message's content
+        self.kinds = array('B')       # MediaKind codes
+        self.offsets = array('Q', [0])  # message i's text is buffer[offsets[i]:offsets[i + 1]]
+        self.buffer = bytearray()
+        self.extend(messages)
+
+    def sender_id(self, sender_name):
+        """Return the interned ID for a sender, adding it if it is new."""
+        sender_id = self._sender_index.get(sender_name)
+        if sender_id is None:
+            sender_id = self._sender_index[sender_name] = len(self.senders)
+            self.senders.append(sender_name)
+        return sender_id
+
+    def append(self, sender_name, content, timestamp):
+        """Add one message to the end of the store."""
+        content = content or ""
+        kind, text = classify_content(content)
+        self.sender_ids.append(self.sender_id(sender_name))
+        self.timestamps.append(int(timestamp or 0))
+        self.lengths.append(len(content))
+        self.kinds.append(kind)
+        if text:
+            self.buffer += text.encode('utf-8', 'surrogatepass')
+        self.offsets.append(len(self.buffer))
+
+    def extend(self, messages):
+        """Add message dictionaries to the end of the store."""
+        for msg in messages:
+            self.append(msg['sender_name'], msg.get('content'), msg.get('timestamp', 0))
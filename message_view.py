@@ -0,0 +1,189 @@
+import bisect
+import tkinter as tk
+from tkinter import ttk
+import tkinter.font as tkfont
+
+from instagram_message_parser import MessageAnalyzer
+
+# Placeholder contents rendered with the "media" style
+MEDIA_CONTENTS = {"[Photo]", "[Video]", "[GIF]", "[File]", "[Audio]", "[Empty message]"}
+
+class VirtualMessageView(ttk.Frame):
+    """Scrollable message list that only renders the rows around the viewport.
+
+    The Text widget holds at most a screenful of messages plus `overscan`
+    rows on either side, so display time and widget memory don't depend on
+    the size of the conversation. Within those rows the Text scrolls by
+    lines as usual; once the view comes close to either edge of the rendered
+    rows they are rendered again around it. The scrollbar is mapped onto the
+    message index rather than onto the widget's contents.
+    """
+
+    def __init__(self, master, font, overscan=10, **kwargs):
+        super().__init__(master, **kwargs)
+        self.overscan = overscan
+        self.messages = []
+        self.sender_tags = {}
+        self.first = 0  # index of the message shown at the top of the viewport
+        self.start = 0  # rendered messages are start .. start + len(_row_lines) - 1
+        self._row_lines = []  # Text line on which each rendered message starts
+        self.highlighted = None  # index of a message to mark, e.g. a search hit
+        self._sync_pending = False
+        self._rendering = False
+
+        self.scrollbar = ttk.Scrollbar(self, command=self._on_scrollbar)
+        self.scrollbar.pack(side=tk.RIGHT, fill=tk.Y)
+        self.text = tk.Text(self, wrap=tk.WORD, font=font, yscrollcommand=self._on_view_changed)
+        self.text.pack(fill=tk.BOTH, expand=True)
+        self.text.tag_configure("highlight", background="#FFF59D")
+        self._line_height = tkfont.Font(font=self.text.cget('font')).metrics('linespace')
+
+        self.text.bind("<MouseWheel>", self._on_mousewheel)
+        self.text.bind("<Button-4>", lambda event: self._scroll_text(-3, "units"))
+        self.text.bind("<Button-5>", lambda event: self._scroll_text(3, "units"))
+        self.text.bind("<Prior>", lambda event: self._scroll_text(-1, "pages"))
+        self.text.bind("<Next>", lambda event: self._scroll_text(1, "pages"))
+        # A new height may need more rows rendered
+        self.text.bind("<Configure>", lambda event: self._schedule_sync())
+
+    def set_messages(self, messages, sender_tags):
+        """Show a new list of messages (newest first), starting from the top."""
+        self.messages = messages
+        self.sender_tags = sender_tags
+        self.first = 0
+        self.highlighted = None
+        self.render()
+
+    def clear(self):
+        self.set_messages([], {})
+
+    def _visible_rows(self):
+        # Each message takes at least two lines (content plus a blank line),
+        # so no more rows than this can be visible at once
+        height = max(self.text.winfo_height(), 1)
+        return max(1, height // (2 * self._line_height) + 1)
+
+    def _scroll_text(self, amount, what):
+        self.text.yview_scroll(amount, what)
+        return "break"
+
+    def scroll(self, rows):
+        """Scroll by whole messages."""
+        self.scroll_to(self.first + rows)
+        return "break"
+
+    def scroll_to(self, index):
+        """Show the message at `index` at the top of the viewport."""
+        # The Text itself stops at the end, so the last messages stay reachable
+        self.first = min(max(0, int(index)), max(0, len(self.messages) - 1))
+        self.render()
+
+    def show_message(self, index):
+        """Scroll to a message and highlight it."""
+        self.highlighted = index
+        self.scroll_to(index)
+
+    def jump_to_timestamp(self, timestamp_ms):
+        """Scroll to the newest message sent at or before `timestamp_ms`."""
+        # Messages are newest first, so search for the first timestamp <= target
+        low, high = 0, len(self.messages)
+        while low < high:
+            mid = (low + high) // 2
+            if self.messages[mid].get('timestamp', 0) > timestamp_ms:
+                low = mid + 1
+            else:
+                high = mid
+        self.scroll_to(low)
+
+    def _on_scrollbar(self, action, amount, unit=None):
+        if action == "moveto":
+            self.scroll_to(float(amount) * len(self.messages))
+        else:
+            self._scroll_text(int(amount), unit)
+
+    def _on_mousewheel(self, event):
+        return self._scroll_text(-3 if event.delta > 0 else 3, "units")
+
+    def _on_view_changed(self, top, bottom):
+        # Called by the Text whenever its view moves, however it was moved
+        if not self._rendering:
+            self._schedule_sync()
+
+    def _schedule_sync(self):
+        if not self._sync_pending:
+            self._sync_pending = True
+            self.after_idle(self._sync)
+
+    def _row_at(self, y):
+        """Position among the rendered rows of the message at pixel row y."""
+        line = int(self.text.index(f"@0,{y}").split(".")[0])
+        return max(0, bisect.bisect_right(self._row_lines, line) - 1)
+
+    def _sync(self):
+        """Follow the Text's view, rendering again if it nears an edge of the rows."""
+        self._sync_pending = False
+        if not self._row_lines:
+            return
+        top = self._row_at(0)
+        bottom = self._row_at(self.text.winfo_height())
+        self.first = self.start + top
+        margin = self.overscan // 2
+        rendered_end = self.start + len(self._row_lines)
+        needed_end = min(len(self.messages), self.first + self._visible_rows() + margin)
+        if (self.start > 0 and top < margin) or rendered_end < needed_end:
+            # Keep the view where it is within its top message
+            offset = self.text.count(f"{self._row_lines[top]}.0", "@0,0", "chars")
+            self.render((offset or (0,))[0])
+        else:
+            self._update_scrollbar(bottom)
+
+    def _update_scrollbar(self, bottom):
+        total = len(self.messages)
+        if total:
+            self.scrollbar.set(self.first / total, min(1.0, (self.start + bottom + 1) / total))
+        else:
+            self.scrollbar.set(0.0, 1.0)
+
+    def render(self, offset=0):
+        """Materialize the rows around `first`, `offset` characters into it at the top."""
+        self._rendering = True
+        try:
+            total = len(self.messages)
+            rows = self._visible_rows()
+            self.start = max(0, self.first - self.overscan)
+            end = min(total, self.first + rows + self.overscan)
+
+            self.text.delete(1.0, tk.END)
+            if self.start == 0:
+                self.text.insert(tk.END, "MESSAGES (Chronological Order)\n", "header",
+                                 "------------------------------\n\n", "header")
+
+            self._row_lines = []
+            for index in range(self.start, end):
+                self._row_lines.append(int(self.text.index("end-1c").split(".")[0]))
+                self._insert_row(self.messages[index], index == self.highlighted)
+            if self.first > 0 and self._row_lines:
+                self.text.yview(f"{self._row_lines[self.first - self.start]}.0 + {offset} chars")
+            else:
+                self.text.yview("1.0")
+        finally:
+            self._rendering = False
+        self._update_scrollbar(max(0, min(end, self.first + rows) - 1 - self.start))
+
+    def _insert_row(self, message, highlight=False):
+        timestamp = MessageAnalyzer.format_timestamp(message.get('timestamp', 0))
+        sender = message['sender_name']
+        tag = self.sender_tags.get(sender, "info")
+        content = message.get('content', '')
+
+        # For special message types, use a distinct style
+        content_tag = "media" if content in MEDIA_CONTENTS else ()
+
+        # One insert per row: time, sender and content with their own tags
+        row_start = self.text.index("end-1c")
+        self.text.insert(tk.END,
+                         f"[{timestamp}]\t", "time",
+                         f"{sender}:\t", tag,
+                         f"{content}\n\n", content_tag)
+        if highlight:
+            self.text.tag_add("highlight", row_start, "end-2c")
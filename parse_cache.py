@@ -0,0 +1,161 @@
+import hashlib
+import os
+import pickle
+import sys
+import tempfile
+
+from instagram_message_parser import PARSER_VERSION, parse_instagram_json
+
+DEFAULT_CACHE_DIR = os.path.join(os.path.expanduser("~"), ".cache", "instagram_message_parser")
+DEFAULT_MAX_BYTES = 512 * 1024 * 1024
+
+_ENTRY_SUFFIX = ".pickle"
+_HASH_CHUNK_SIZE = 1024 * 1024
+
+def file_fingerprint(file_path):
+    """Return the (path, size, mtime, content hash) key identifying a file's contents."""
+    stat = os.stat(file_path)
+    digest = hashlib.blake2b(digest_size=16)
+    with open(file_path, 'rb') as file:
+        for chunk in iter(lambda: file.read(_HASH_CHUNK_SIZE), b''):
+            digest.update(chunk)
+    return {
+        "path": os.path.abspath(file_path),
+        "size": stat.st_size,
+        "mtime_ns": stat.st_mtime_ns,
+        "content_hash": digest.hexdigest()
+    }
+
+class ParseCache:
+    """On-disk cache of parse_instagram_json results, one entry per source file.
+
+    Entries are keyed by the file's path, size, mtime and content hash, and
+    tagged with PARSER_VERSION so results produced by other filtering rules
+    are never served. Least recently used entries are evicted once the
+    directory grows past max_bytes.
+    """
+
+    def __init__(self, directory=DEFAULT_CACHE_DIR, max_bytes=DEFAULT_MAX_BYTES):
+        self.directory = directory
+        self.max_bytes = max_bytes
+
+    def _entry_path(self, file_path):
+        name = hashlib.blake2b(os.path.abspath(file_path).encode('utf-8'), digest_size=16).hexdigest()
+        return os.path.join(self.directory, name + _ENTRY_SUFFIX)
+
+    def get(self, file_path, fingerprint=None):
+        """Return the cached parse result for a file, or None if it is missing or stale.
+
+        `fingerprint` is the file's file_fingerprint, if already computed.
+        """
+        entry_path = self._entry_path(file_path)
+        try:
+            with open(entry_path, 'rb') as entry:
+                # The header is a separate pickle so stale entries are
+                # rejected without loading their messages.
+                header = pickle.load(entry)
+                if header.get("parser_version") != PARSER_VERSION:
+                    return None
+                stat = os.stat(file_path)
+                if header["size"] != stat.st_size or header["mtime_ns"] != stat.st_mtime_ns:
+                    return None
+                if fingerprint is None:
+                    fingerprint = file_fingerprint(file_path)
+                if header != {**fingerprint, "parser_version": PARSER_VERSION}:
+                    return None
+                result = pickle.load(entry)
+        except (OSError, pickle.UnpicklingError, EOFError, KeyError, AttributeError):
+            return None
+
+        # Mark the entry as recently used for LRU eviction
+        try:
+            os.utime(entry_path)
+        except OSError:
+            pass
+        return result
+
+    def put(self, file_path, result, fingerprint=None):
+        """Store a parse result for a file and evict old entries if over the size limit.
+
+        `fingerprint` should be taken before the file was parsed, so a file
+        changed in the meantime is never cached under its new contents.
+        """
+        if fingerprint is None:
+            fingerprint = file_fingerprint(file_path)
+        header = {**fingerprint, "parser_version": PARSER_VERSION}
+        os.makedirs(self.directory, exist_ok=True)
+        fd, temp_path = tempfile.mkstemp(dir=self.directory, suffix=".tmp")
+        try:
+            with os.fdopen(fd, 'wb') as entry:
+                pickle.dump(header, entry, protocol=pickle.HIGHEST_PROTOCOL)
+                pickle.dump(result, entry, protocol=pickle.HIGHEST_PROTOCOL)
+            os.replace(temp_path, self._entry_path(file_path))
+        except BaseException:
+            os.unlink(temp_path)
+            raise
+        self.evict()
+
+    def load(self, file_path, parser=parse_instagram_json):
+        """Return the parse result for a file, parsing and caching it on a miss."""
+        try:
+            # Hashed once, before parsing, for both the lookup and the new entry
+            fingerprint = file_fingerprint(file_path)
+        except OSError:
+            return parser(file_path)
+        result = self.get(file_path, fingerprint)
+        if result is None:
+            result = parser(file_path)
+            # parse_instagram_json reports read errors as an empty result;
+            # don't remember those
+            if result["messages"] or result["participants"]:
+                try:
+                    self.put(file_path, result, fingerprint)
+                except OSError as exc:
+                    print(f"Could not cache {file_path}: {exc}", file=sys.stderr)
+        return result
+
+    def invalidate(self, file_path):
+        """Drop the cached entry for a file, if any."""
+        try:
+            os.remove(self._entry_path(file_path))
+        except FileNotFoundError:
+            pass
+
+    def clear(self):
+        """Remove every cached entry."""
+        for path, _, _ in self._entries():
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+
+    def _entries(self):
+        """Return (path, size, last used) for each entry in the cache directory."""
+        entries = []
+        try:
+            names = os.listdir(self.directory)
+        except FileNotFoundError:
+            return entries
+        for name in names:
+            if not name.endswith(_ENTRY_SUFFIX):
+                continue
+            path = os.path.join(self.directory, name)
+            try:
+                stat = os.stat(path)
+            except FileNotFoundError:
+                continue
+            entries.append((path, stat.st_size, stat.st_mtime_ns))
+        return entries
+
+    def evict(self):
+        """Remove least recently used entries until the cache fits in max_bytes."""
+        entries = sorted(self._entries(), key=lambda entry: entry[2])
+        total = sum(size for _, size, _ in entries)
+        for path, size, _ in entries:
+            if total <= self.max_bytes:
+                break
+            try:
+                os.remove(path)
+            except FileNotFoundError:
+                pass
+            total -= size
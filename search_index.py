@@ -0,0 +1,179 @@
+import bisect
+import heapq
+import math
+import re
+from array import array
+
+from instagram_message_parser import tokenize_words
+
+# Longest list of words a single prefix term may expand to
+MAX_PREFIX_EXPANSIONS = 500
+
+_QUERY_TERM_RE = re.compile(r'"([^"]*)"?|(\S+)')
+
+def parse_query(query):
+    """Split a query into ("word" | "prefix" | "phrase", value) terms.
+
+    Quoted text is a phrase, a trailing * makes a prefix term, and words that
+    tokenize into several parts (like "don't") are matched as phrases.
+    """
+    terms = []
+    for match in _QUERY_TERM_RE.finditer(query):
+        phrase, word = match.groups()
+        if phrase is not None:
+            words = tokenize_words(phrase)
+            if len(words) == 1:
+                terms.append(("word", words[0]))
+            elif words:
+                terms.append(("phrase", words))
+            continue
+        prefix = word.endswith("*")
+        words = tokenize_words(word.rstrip("*"))
+        if not words:
+            continue
+        if prefix and len(words) == 1:
+            terms.append(("prefix", words[0]))
+        elif len(words) == 1:
+            terms.append(("word", words[0]))
+        else:
+            terms.append(("phrase", words))
+    return terms
+
+class SearchIndex:
+    """Inverted index over message content for word, prefix and phrase search.
+
+    Built once over a message list (tokenized like the word statistics); each
+    word maps to the ascending indices of the messages containing it and how
+    often it occurs in each. Queries only touch the postings of their terms,
+    so lookups stay fast however many messages there are. The index is never
+    modified after it is built, so it can be searched from any thread.
+    """
+
+    def __init__(self, messages):
+        self.messages = messages
+        postings = {}  # word -> (message indices, occurrences in each)
+        for index, msg in enumerate(messages):
+            content = msg.get('content')
+            if not content:
+                continue
+            for word in tokenize_words(content):
+                posting = postings.get(word)
+                if posting is None:
+                    posting = postings[word] = (array('I'), array('I'))
+                ids, counts = posting
+                if ids and ids[-1] == index:
+                    counts[-1] += 1
+                else:
+                    ids.append(index)
+                    counts.append(1)
+        self._postings = postings
+        self._vocabulary = sorted(postings)  # for prefix lookups
+
+    def _term_frequencies(self, term, truncated):
+        """Return {message index: occurrences} for one parsed query term.
+
+        Prefix terms that matched more than MAX_PREFIX_EXPANSIONS words are
+        added to the `truncated` list.
+        """
+        kind, value = term
+        if kind == "word":
+            return dict(zip(*self._postings.get(value, ((), ()))))
+        if kind == "prefix":
+            start = bisect.bisect_left(self._vocabulary, value)
+            words = self._vocabulary[start:start + MAX_PREFIX_EXPANSIONS + 1]
+            words = [word for word in words if word.startswith(value)]
+            if len(words) > MAX_PREFIX_EXPANSIONS:
+                truncated.append(value)
+                del words[MAX_PREFIX_EXPANSIONS:]
+            frequencies = {}
+            for word in words:
+                if not frequencies:
+                    frequencies = dict(zip(*self._postings[word]))
+                    continue
+                get = frequencies.get
+                for index, count in zip(*self._postings[word]):
+                    frequencies[index] = get(index, 0) + count
+            return frequencies
+
+        # Phrase: messages containing every word, then check adjacency
+        candidates = None
+        for word in value:
+            ids = set(self._postings.get(word, ((), ()))[0])
+            candidates = ids if candidates is None else candidates & ids
+            if not candidates:
+                return {}
+        frequencies = {}
+        size = len(value)
+        for index in candidates:
+            words = tokenize_words(self.messages[index]['content'])
+            count = sum(1 for i in range(len(words) - size + 1) if words[i:i + size] == value)
+            if count:
+                frequencies[index] = count
+        return frequencies
+
+    def search(self, query, sender=None, start=None, end=None, page=0, page_size=50):
+        """Find messages matching every term of `query`, best matches first.
+
+        Args:
+            query: Words, prefix* terms and "quoted phrases"
+            sender: Only match messages from this sender (None for all)
+            start, end: Optional inclusive timestamp range in milliseconds
+            page, page_size: Which page of ranked hits to return
+
+        Returns:
+            Dictionary with the "total" number of hits, the "page" returned
+            (the last one if `page` is past the end), that page's "hits"
+            ({"index", "score", "message"}, where index is the message's
+            position in the indexed list) and the prefixes whose matches were
+            "truncated" to MAX_PREFIX_EXPANSIONS words
+        """
+        terms = parse_query(query)
+        truncated = []
+        if not terms:
+            return {"total": 0, "page": 0, "hits": [], "truncated": truncated}
+
+        # Intersect terms starting from the rarest
+        matches = sorted((self._term_frequencies(term, truncated) for term in terms), key=len)
+        if not matches[0]:
+            return {"total": 0, "page": 0, "hits": [], "truncated": truncated}
+        candidates = matches[0].keys()
+        for frequencies in matches[1:]:
+            candidates = candidates & frequencies.keys()
+
+        if sender is not None or start is not None or end is not None:
+            filtered = []
+            for index in candidates:
+                msg = self.messages[index]
+                timestamp = msg.get('timestamp', 0)
+                if ((sender is None or msg['sender_name'] == sender) and
+                        (start is None or timestamp >= start) and
+                        (end is None or timestamp <= end)):
+                    filtered.append(index)
+            candidates = filtered
+
+        total_messages = len(self.messages)
+        scores = dict.fromkeys(candidates, 0.0)
+        for frequencies in matches:
+            idf = math.log(1 + total_messages / len(frequencies))
+            # Occurrence counts are small numbers, so each weight is computed once
+            weights = {}
+            for index in scores:
+                count = frequencies[index]
+                weight = weights.get(count)
+                if weight is None:
+                    weight = weights[count] = (1 + math.log(count)) * idf
+                scores[index] += weight
+
+        # Best score first; ties keep message order (newest first). Only the
+        # hits up to the requested page are ranked.
+        total = len(scores)
+        page = min(max(0, page), max(0, (total - 1) // page_size))
+        ranked = heapq.nsmallest((page + 1) * page_size,
+                                 [(-score, index) for index, score in scores.items()])
+        return {
+            "total": total,
+            "page": page,
+            "hits": [{"index": index, "score": -score, "message": self.messages[index]}
+                     for score, index in ranked[page * page_size:]],
+            "truncated": truncated
+        }
@@ -0,0 +1,66 @@
+import json
+import os
+
+from export_catalog import build_catalog, catalog_conversation, find_export_conversations
+
+def escaped(text):
+    return text.encode("utf-8").decode("latin1")
+
+def write_file(path, timestamps, participants=("Ann", "Bob"), title=None):
+    document = {
+        "participants": [{"name": escaped(name)} for name in participants],
+        "messages": [{"sender_name": participants[0], "timestamp_ms": t, "content": "hi"}
+                     for t in timestamps] + [{"sender_name": participants[1], "timestamp_ms": 5,
+                                              "content": "Liked a message"}],
+    }
+    if title is not None:
+        document["title"] = escaped(title)
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump(document, file)
+    return str(path)
+
+def write_inbox(root):
+    inbox = root / "your_instagram_activity" / "messages" / "inbox"
+    write_file(inbox / "ann_1" / "message_1.json", [3000, 2000], title="Zoë & co")
+    write_file(inbox / "ann_1" / "message_2.json", [1000])
+    write_file(inbox / "cy_2" / "message_1.json", [9000, 100], ("Cy", "Dee"))
+    (inbox / "empty_3").mkdir()
+    return inbox
+
+def test_find_export_conversations(tmp_path):
+    inbox = write_inbox(tmp_path)
+    assert find_export_conversations(str(tmp_path)) == [
+        ("ann_1", [str(inbox / "ann_1" / "message_1.json"), str(inbox / "ann_1" / "message_2.json")]),
+        ("cy_2", [str(inbox / "cy_2" / "message_1.json")])]
+    # The inbox itself works as a root too
+    assert find_export_conversations(str(inbox)) == find_export_conversations(str(tmp_path))
+    assert find_export_conversations(str(tmp_path / "missing")) == []
+
+def test_catalog_conversation(tmp_path):
+    inbox = write_inbox(tmp_path)
+    files = [str(inbox / "ann_1" / "message_1.json"), str(inbox / "ann_1" / "message_2.json")]
+    entry = catalog_conversation("ann_1", files)
+    assert entry == {
+        "name": "ann_1",
+        "title": "Zoë & co",
+        "participants": ["Ann", "Bob"],
+        "files": files,
+        "size": sum(os.path.getsize(f) for f in files),
+        # Raw records: the like is counted too
+        "messages": 5,
+        "first_timestamp": 5,
+        "last_timestamp": 3000
+    }
+
+def test_catalog_title_defaults_to_participants(tmp_path):
+    path = write_file(tmp_path / "dee_1" / "message_1.json", [10], ("Dée", "Eve"))
+    entry = catalog_conversation("dee_1", [path])
+    assert entry["participants"] == ["Dée", "Eve"]
+    assert entry["title"] == "Dée, Eve"
+
+def test_build_catalog_orders_by_latest_activity(tmp_path):
+    write_inbox(tmp_path)
+    entries = build_catalog(str(tmp_path), max_workers=1)
+    assert [entry["name"] for entry in entries] == ["cy_2", "ann_1"]
+    assert build_catalog(str(tmp_path), max_workers=2) == entries
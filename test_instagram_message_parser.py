@@ -0,0 +1,213 @@
+import csv
+import io
+import json
+import os
+from collections import Counter
+
+import pytest
+
+from instagram_message_parser import (CSV_FIELDS, AnalysisSession, MessageAnalyzer, WordIndex,
+                                      _JSONStreamReader, analyze_messages, decode_content,
+                                      decode_contents, decode_failure_count, deduplicate_streams,
+                                      iter_instagram_json, load_instagram_files, main,
+                                      parse_instagram_json, reset_decode_failures,
+                                      summarize_aggregate, tokenize_words)
+
+PARTICIPANTS = [{"name": "Ann"}, {"name": "Bob"}, {"name": "Cy"}]
+
+def message(sender, timestamp_ms, content):
+    return {"sender_name": sender, "timestamp_ms": timestamp_ms, "content": content}
+
+def write_export(path, messages):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"participants": PARTICIPANTS, "messages": messages, "title": "test"}, file)
+    return str(path)
+
+def conversation(start, count, senders=("Ann", "Bob", "Cy")):
+    """count messages newest-first from start, with repeated words and ties."""
+    words = ["alpha", "beta", "gamma", "delta", "epsilon", "cafÃ©", "zeta"]
+    return [message(senders[i % len(senders)], (start - i) * 1000,
+                    " ".join(words[(i * j) % len(words)] for j in range(1, i % 5 + 2)))
+            for i in range(count)]
+
+def test_stream_reader_matches_json_load_across_chunk_sizes():
+    document = json.dumps({
+        "numbers": [0, -1, 1.5e-3, 12345678901234567890, 2.0E+10, -0.25],
+        "strings": ["", "a \"quoted\" \\ string", "é€\U0001F600", "tab\tnew\nline"],
+        "literals": [True, False, None],
+        "nested": {"a": [[], {}, [{"b": [1, [2, [3]]]}]]}
+    }, ensure_ascii=False)
+    expected = json.loads(document)
+    for chunk_size in range(1, 40):
+        reader = _JSONStreamReader(io.StringIO(document), chunk_size)
+        assert reader.value() == expected, chunk_size
+
+def test_iter_instagram_json_is_independent_of_chunk_size(tmp_path):
+    path = write_export(tmp_path / "message_1.json", conversation(1000, 50))
+    expected = list(iter_instagram_json(path))
+    assert [kind for kind, value in expected].count("message") == 50
+    for chunk_size in (1, 2, 3, 7, 64, 1000):
+        assert list(iter_instagram_json(path, chunk_size)) == expected, chunk_size
+
+def test_malformed_json_is_rejected(tmp_path):
+    path = tmp_path / "message_1.json"
+    path.write_text('{"participants": [], "messages": [{"sender_name": "Ann", oops}]}')
+    with pytest.raises(ValueError):
+        list(iter_instagram_json(str(path), 4))
+    assert parse_instagram_json(str(path))["messages"] == []
+
+def test_word_index_matches_counting_each_query(tmp_path):
+    messages = parse_instagram_json(write_export(tmp_path / "a.json", conversation(1000, 200)))["messages"]
+    index = WordIndex(messages)
+    for sender in (None, "Ann", "Cy"):
+        for min_length in (1, 5, 6):
+            # Counter.most_common keeps first-seen order for ties too
+            expected = Counter(word for msg in messages if sender in (None, msg['sender_name'])
+                               for word in tokenize_words(msg['content']) if len(word) >= min_length)
+            assert index.most_common(sender, 3, min_length) == expected.most_common(3)
+            assert index.most_common(sender, None, min_length) == expected.most_common()
+
+@pytest.mark.parametrize("max_workers", [1, 2])
+def test_load_merges_files_newest_first_with_ties_in_file_order(tmp_path, max_workers):
+    # Interleaved time ranges with shared timestamps, and one file out of order
+    paths = [write_export(tmp_path / "a.json", conversation(1000, 30, ("Ann", "Bob"))),
+             write_export(tmp_path / "b.json", conversation(1010, 30, ("Cy",))),
+             write_export(tmp_path / "c.json", conversation(990, 30, ("Bob", "Cy"))[::-1])]
+    merged = load_instagram_files(paths, max_workers)
+    # Sorting is stable, so ties stay in file order
+    expected = sorted((m for path in paths for m in parse_instagram_json(path)["messages"]),
+                      key=lambda m: m['timestamp'], reverse=True)
+    assert merged["messages"] == expected
+    assert merged["participants"] == ["Ann", "Bob", "Cy"]
+
+def write_conversations(root):
+    """Two conversation directories of two files each; returns their paths."""
+    directories = []
+    for name, start in (("alice_1", 1000), ("bob_2", 2000)):
+        directory = root / name
+        directory.mkdir()
+        write_export(directory / "message_1.json", conversation(start, 30))
+        write_export(directory / "message_2.json", conversation(start - 30, 30))
+        directories.append(directory)
+    return directories
+
+def test_cli_writes_a_json_summary_per_conversation(tmp_path):
+    directories = write_conversations(tmp_path)
+    output = tmp_path / "summary.json"
+    assert main([str(d) for d in directories] + ["-j", "1", "--longest", "3", "-o", str(output)]) == 0
+    summaries = [json.loads(line) for line in output.read_text(encoding="utf-8").splitlines()]
+    assert [s["conversation"] for s in summaries] == ["alice_1", "bob_2"]
+    for summary, directory in zip(summaries, directories):
+        messages = load_instagram_files([str(directory / "message_1.json"),
+                                         str(directory / "message_2.json")], 1)["messages"]
+        assert summary["stats"] == MessageAnalyzer.calculate_stats(messages)
+        assert [m["content"] for m in summary["longest"]] == \
+            [m["content"] for m in MessageAnalyzer.find_longest_messages(messages, 3)]
+
+def test_cli_writes_csv_files_per_conversation(tmp_path):
+    directories = write_conversations(tmp_path)
+    output_dir = tmp_path / "out"
+    assert main([str(d) for d in directories] + ["-j", "1", "-f", "csv", "--output-dir", str(output_dir)]) == 0
+    assert sorted(os.listdir(output_dir)) == ["alice_1.csv", "bob_2.csv"]
+    with open(output_dir / "alice_1.csv", encoding="utf-8", newline="") as file:
+        rows = list(csv.reader(file))
+    assert rows[0] == CSV_FIELDS
+    assert ["alice_1", "total_messages", "", "", "", "60", ""] in rows
+    assert sum(1 for row in rows if row[1] == "longest") == 20
+
+def escaped(text):
+    """text as Instagram exports it: UTF-8 bytes escaped as latin1 characters."""
+    return text.encode("utf-8").decode("latin1")
+
+def test_batch_decode_matches_decoding_each_text():
+    decodable = ["plain ascii", escaped("café"), escaped("😀"), escaped("😀" * 20),
+                 escaped("naïve façade with a much longer tail"), "", None]
+    undecodable = ["Ã", "Ã trailing lone lead byte"]
+    # Not latin1-escaped, or holding the character batches are joined with
+    unbatchable = ["€ is not latin1", escaped("nul\0inside")]
+    for texts in (decodable, decodable + undecodable, undecodable[1:] + decodable,
+                  decodable + unbatchable + undecodable):
+        reset_decode_failures()
+        expected = [decode_content(text) for text in texts]
+        failures = decode_failure_count()
+        reset_decode_failures()
+        assert decode_contents(texts) == expected
+        assert decode_failure_count() == failures
+    assert decode_contents(decodable)[1:5] == ["café", "😀", "😀" * 20, "naïve façade with a much longer tail"]
+
+def test_undecodable_contents_are_kept_and_counted(tmp_path):
+    contents = [escaped("héllo"), "Ã", "Ã and more", escaped("fine"), "Ã"]
+    path = write_export(tmp_path / "a.json", [message("Ann", 1000 - i, c) for i, c in enumerate(contents)])
+    parsed = parse_instagram_json(path)
+    assert [m["content"] for m in parsed["messages"]] == ["héllo", "Ã", "Ã and more", "fine", "Ã"]
+    assert parsed["decode_failures"] == 3
+
+def test_aggregate_matches_the_separate_analyses(tmp_path):
+    messages = parse_instagram_json(write_export(tmp_path / "a.json", conversation(1000, 300)))["messages"]
+    aggregate = MessageAnalyzer.aggregate(messages, longest=7)
+    assert MessageAnalyzer.calculate_stats(aggregate) == MessageAnalyzer.calculate_stats(messages)
+    # Lengths repeat a lot, so this also checks that ties go to the earliest message
+    assert (MessageAnalyzer.find_longest_messages(aggregate, 7) ==
+            MessageAnalyzer.find_longest_messages(messages, 7))
+    for min_length in (1, 4):
+        assert (MessageAnalyzer.find_most_common_words(aggregate, None, 10, min_length) ==
+                MessageAnalyzer.find_most_common_words(messages, None, 10, min_length))
+        assert (MessageAnalyzer.analyze_word_usage_by_sender(aggregate, 10, min_length) ==
+                MessageAnalyzer.analyze_word_usage_by_sender(messages, 10, min_length))
+    timestamps = [m["timestamp"] for m in messages]
+    assert (aggregate.first_timestamp, aggregate.last_timestamp) == (min(timestamps), max(timestamps))
+
+def test_merged_aggregates_match_one_pass(tmp_path):
+    messages = parse_instagram_json(write_export(tmp_path / "a.json", conversation(1000, 90)))["messages"]
+    whole = analyze_messages(messages, longest=5)
+    for split in (0, 1, 40, 90):
+        merged = MessageAnalyzer.aggregate(messages[:split], 5).merge(
+            MessageAnalyzer.aggregate(messages[split:], 5))
+        assert summarize_aggregate(merged, 5) == whole, split
+
+def test_remove_file_matches_a_fresh_load(tmp_path):
+    paths = [write_export(tmp_path / "a.json", conversation(1000, 40, ("Cy", "Ann"))),
+             write_export(tmp_path / "b.json", conversation(1030, 40)),
+             write_export(tmp_path / "c.json", conversation(500, 30, ("Bob", "Ann")))]
+    for removed in paths:
+        session = AnalysisSession(longest=5)
+        session.add_files(paths[:2], max_workers=1)
+        session.summary()
+        session.add_files(paths[2:], max_workers=1)
+        session.summary()
+        session.remove_file(removed)
+
+        fresh = AnalysisSession(longest=5)
+        fresh.add_files([p for p in paths if p != removed], max_workers=1)
+        assert session.messages == fresh.messages
+        assert session.file_info() == fresh.file_info()
+        assert session.summary() == fresh.summary()
+
+def record(sender, timestamp, content):
+    """A parsed message, as parse_instagram_json returns them."""
+    return {"sender_name": sender, "content": content, "timestamp": timestamp}
+
+def test_deduplicate_streams_drops_overlap_once():
+    first = [record("Ann", 5, "x"), record("Bob", 4, "y"), record("Ann", 3, "z")]
+    # Shares two messages with first, and sends "y" twice itself
+    second = [record("Cy", 6, "w"), record("Bob", 4, "y"), record("Bob", 4, "y"),
+              record("Ann", 3, "z")]
+    separate = [record("Ann", 1, "x")]
+    streams, duplicates = deduplicate_streams([first, second, separate])
+    assert duplicates == [0, 2, 0]
+    assert streams[0] is first and streams[2] is separate
+    assert streams[1] == [record("Cy", 6, "w"), record("Bob", 4, "y")]
+
+def test_session_counts_overlapping_exports_once(tmp_path):
+    whole = conversation(1000, 60)
+    paths = [write_export(tmp_path / "a.json", whole[:40]),
+             write_export(tmp_path / "b.json", whole[20:])]
+    session = AnalysisSession()
+    session.add_files(paths, max_workers=1)
+    assert [f["duplicates"] for f in session.file_info()] == [0, 20]
+
+    single = AnalysisSession()
+    single.add_files([write_export(tmp_path / "whole.json", whole)], max_workers=1)
+    assert session.messages == single.messages
+    assert session.summary() == single.summary()
+    assert load_instagram_files(paths, 1)["messages"] == single.messages
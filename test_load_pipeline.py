@@ -0,0 +1,62 @@
+import threading
+import time
+
+from load_pipeline import LoadPipeline
+
+class FakeRoot:
+    """Stands in for Tk; the tests call LoadPipeline._poll themselves."""
+
+    def after(self, delay, callback):
+        pass
+
+def run_until(pipeline, events, last_event, timeout=5):
+    deadline = time.monotonic() + timeout
+    while last_event not in events:
+        assert time.monotonic() < deadline, events
+        pipeline._poll()
+        time.sleep(0.01)
+
+def test_jobs_run_one_at_a_time_in_start_order():
+    events = []
+    pipeline = LoadPipeline(FakeRoot(), lambda kind, payload: events.append((kind, payload)))
+    for n in range(3):
+        pipeline.start(lambda report, n=n: report("result", n))
+    pipeline.start(lambda report: report("result", "last"))
+    run_until(pipeline, events, ("result", "last"))
+    pipeline.shutdown()
+    assert [payload for kind, payload in events if kind == "result"] == [0, 1, 2, "last"]
+    assert [kind for kind, payload in events[:3]] == ["started", "result", "finished"]
+
+def test_replace_cancels_running_and_queued_jobs():
+    events = []
+    pipeline = LoadPipeline(FakeRoot(), lambda kind, payload: events.append((kind, payload)))
+    running = threading.Event()
+    release = threading.Event()
+
+    def slow(report):
+        running.set()
+        release.wait(5)
+        report("result", "slow")
+
+    pipeline.start(slow)
+    pipeline.start(lambda report: report("result", "queued"))
+    assert running.wait(5)
+    pipeline.start(lambda report: report("result", "new"), replace=True)
+    release.set()
+    run_until(pipeline, events, ("finished", None))
+    pipeline.shutdown()
+    assert events == [("started", None), ("result", "new"), ("finished", None)]
+
+def test_job_errors_are_reported():
+    events = []
+    pipeline = LoadPipeline(FakeRoot(), lambda kind, payload: events.append((kind, payload)))
+
+    def broken(report):
+        raise ValueError("bad file")
+
+    pipeline.start(broken)
+    pipeline.start(lambda report: report("result", "after"))
+    run_until(pipeline, events, ("result", "after"))
+    pipeline.shutdown()
+    errors = [payload for kind, payload in events if kind == "error"]
+    assert len(errors) == 1 and isinstance(errors[0], ValueError)
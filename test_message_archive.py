@@ -0,0 +1,54 @@
+import pytest
+
+from instagram_message_parser import MessageAnalyzer, analyze_messages
+from message_archive import is_archive, open_archive, write_archive
+from message_store import MessageStore
+
+MESSAGES = [
+    {"sender_name": "Ann", "content": "see you at the café 😀", "timestamp": 7000},
+    {"sender_name": "Bob", "content": "[Photo]", "timestamp": 6000},
+    {"sender_name": "Ann", "content": "[Shared: https://example.com/a]", "timestamp": 5000},
+    {"sender_name": "Cy", "content": "a longer message than the others here", "timestamp": 4000},
+    {"sender_name": "Bob", "content": "[Empty message]", "timestamp": 3000},
+    {"sender_name": "Zoë", "content": "short one", "timestamp": 2000},
+]
+
+def test_archive_round_trip(tmp_path):
+    files = [{"path": "message_1.json", "messages": len(MESSAGES)}]
+    path = str(tmp_path / "chat.igarchive")
+    assert write_archive(path, MESSAGES, ["Ann", "Bob", "Cy", "Zoë"], files) == len(MESSAGES)
+    assert is_archive(path)
+    with open_archive(path) as archive:
+        assert len(archive) == len(MESSAGES)
+        assert list(archive) == MESSAGES
+        assert archive[-1] == MESSAGES[-1]
+        assert archive.participants == ["Ann", "Bob", "Cy", "Zoë"]
+        assert archive.files == files
+        assert analyze_messages(archive) == analyze_messages(MESSAGES)
+        assert (MessageAnalyzer.find_longest_messages(archive, 3) ==
+                MessageAnalyzer.find_longest_messages(MESSAGES, 3))
+
+def test_archive_of_a_store_or_archive_is_the_same(tmp_path):
+    first, second, third = (str(tmp_path / f"{n}.igarchive") for n in (1, 2, 3))
+    write_archive(first, MESSAGES)
+    write_archive(second, MessageStore(MESSAGES))
+    with open_archive(first) as archive:
+        write_archive(third, archive)
+    with open(first, "rb") as a, open(second, "rb") as b, open(third, "rb") as c:
+        assert a.read() == b.read() == c.read()
+
+def test_other_files_are_rejected(tmp_path):
+    path = tmp_path / "message_1.json"
+    path.write_text('{"participants": [], "messages": []}')
+    assert not is_archive(str(path))
+    with pytest.raises(ValueError):
+        open_archive(str(path))
+
+    archive = str(tmp_path / "chat.igarchive")
+    write_archive(archive, MESSAGES)
+    with open(archive, "rb") as file:
+        data = file.read()
+    with open(archive, "wb") as file:
+        file.write(data[:-16])
+    with pytest.raises(ValueError):
+        open_archive(archive)
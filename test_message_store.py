@@ -0,0 +1,40 @@
+import pytest
+
+from instagram_message_parser import MessageAnalyzer
+from message_store import MediaKind, MessageStore, classify_content
+
+MESSAGES = [
+    {"sender_name": "Ann", "content": "see you at the café 😀", "timestamp": 5000},
+    {"sender_name": "Bob", "content": "[Photo]", "timestamp": 7000},
+    {"sender_name": "Ann", "content": "[Shared: https://example.com/a]", "timestamp": 4000},
+    {"sender_name": "Cy", "content": "a longer message than the others here", "timestamp": 6000},
+    {"sender_name": "Bob", "content": "[Empty message]", "timestamp": 1000},
+    {"sender_name": "Ann", "content": "short", "timestamp": 6000},
+    {"sender_name": "Cy", "content": "", "timestamp": 0},
+]
+
+def test_classify_content():
+    assert classify_content("[Video]") == (MediaKind.VIDEO, "")
+    assert classify_content("[Shared: link]") == (MediaKind.SHARE, "link")
+    assert classify_content("[Photo] of us") == (MediaKind.TEXT, "[Photo] of us")
+
+def test_store_round_trips_messages():
+    store = MessageStore(MESSAGES[:3])
+    store.extend(MESSAGES[3:])
+    assert len(store) == len(MESSAGES)
+    assert list(store) == MESSAGES
+    assert store[-1] == MESSAGES[-1]
+    assert store.senders == ["Ann", "Bob", "Cy"]
+    with pytest.raises(IndexError):
+        store[len(MESSAGES)]
+    assert list(store.take([3, 0])) == [MESSAGES[3], MESSAGES[0]]
+
+def test_column_fast_paths_match_lists():
+    store = MessageStore(MESSAGES)
+    assert MessageAnalyzer.calculate_stats(store) == MessageAnalyzer.calculate_stats(MESSAGES)
+    for count in (1, 3, 20):
+        assert (MessageAnalyzer.find_longest_messages(store, count) ==
+                MessageAnalyzer.find_longest_messages(MESSAGES, count))
+    for reverse in (True, False):
+        assert (list(MessageAnalyzer.sort_by_timestamp(store, reverse)) ==
+                MessageAnalyzer.sort_by_timestamp(MESSAGES, reverse))
@@ -0,0 +1,85 @@
+import json
+import os
+
+import parse_cache
+from parse_cache import ParseCache
+
+def write_file(path, content):
+    with open(path, "w", encoding="utf-8") as file:
+        json.dump({"participants": [{"name": "Ann"}],
+                   "messages": [{"sender_name": "Ann", "timestamp_ms": 1000, "content": content}]}, file)
+    return str(path)
+
+class CountingParser:
+    def __init__(self):
+        self.calls = 0
+
+    def __call__(self, file_path):
+        self.calls += 1
+        return parse_cache.parse_instagram_json(file_path)
+
+def test_unchanged_file_is_served_from_the_cache(tmp_path):
+    path = write_file(tmp_path / "message_1.json", "hello")
+    cache, parser = ParseCache(str(tmp_path / "cache")), CountingParser()
+    first = cache.load(path, parser)
+    assert cache.load(path, parser) == first
+    assert ParseCache(cache.directory).load(path, parser) == first
+    assert parser.calls == 1
+    assert first["messages"][0]["content"] == "hello"
+
+def test_changed_file_is_parsed_again(tmp_path):
+    path = write_file(tmp_path / "message_1.json", "hello")
+    cache, parser = ParseCache(str(tmp_path / "cache")), CountingParser()
+    cache.load(path, parser)
+    stat = os.stat(path)
+    # Same size and mtime: only the content hash tells the versions apart
+    write_file(path, "howdy")
+    os.utime(path, ns=(stat.st_atime_ns, stat.st_mtime_ns))
+    assert cache.load(path, parser)["messages"][0]["content"] == "howdy"
+    assert parser.calls == 2
+
+def test_entries_from_another_parser_version_are_ignored(tmp_path, monkeypatch):
+    path = write_file(tmp_path / "message_1.json", "hello")
+    cache, parser = ParseCache(str(tmp_path / "cache")), CountingParser()
+    cache.load(path, parser)
+    monkeypatch.setattr(parse_cache, "PARSER_VERSION", parse_cache.PARSER_VERSION + 1)
+    assert cache.get(path) is None
+    cache.load(path, parser)
+    assert parser.calls == 2
+
+def test_invalidate_and_clear(tmp_path):
+    paths = [write_file(tmp_path / f"message_{i}.json", "hello") for i in (1, 2)]
+    cache, parser = ParseCache(str(tmp_path / "cache")), CountingParser()
+    for path in paths:
+        cache.load(path, parser)
+    cache.invalidate(paths[0])
+    assert cache.get(paths[0]) is None and cache.get(paths[1]) is not None
+    cache.clear()
+    assert cache.get(paths[1]) is None
+
+def test_least_recently_used_entries_are_evicted(tmp_path):
+    paths = [write_file(tmp_path / f"message_{i}.json", "hello") for i in (1, 2, 3)]
+    cache, parser = ParseCache(str(tmp_path / "cache")), CountingParser()
+    cache.load(paths[0], parser)
+    entry_size = os.path.getsize(cache._entry_path(paths[0]))
+    cache.max_bytes = 2 * entry_size
+    cache.load(paths[1], parser)
+    # Age both entries, the first the most, then use the first again
+    os.utime(cache._entry_path(paths[0]), ns=(10**9, 10**9))
+    os.utime(cache._entry_path(paths[1]), ns=(2 * 10**9, 2 * 10**9))
+    cache.load(paths[0], parser)
+    cache.load(paths[2], parser)
+    assert cache.get(paths[1]) is None
+    assert cache.get(paths[0]) is not None and cache.get(paths[2]) is not None
+
+def test_file_changed_while_parsing_is_not_served_stale(tmp_path):
+    path = write_file(tmp_path / "message_1.json", "hello")
+    cache = ParseCache(str(tmp_path / "cache"))
+
+    def parse_then_edit(file_path):
+        result = parse_cache.parse_instagram_json(file_path)
+        write_file(file_path, "changed")
+        return result
+
+    assert cache.load(path, parse_then_edit)["messages"][0]["content"] == "hello"
+    assert cache.load(path)["messages"][0]["content"] == "changed"
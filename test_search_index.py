@@ -0,0 +1,66 @@
+import search_index
+from search_index import SearchIndex, parse_query
+
+def record(sender, timestamp, content):
+    return {"sender_name": sender, "content": content, "timestamp": timestamp}
+
+# Newest first, like a loaded conversation
+MESSAGES = [
+    record("Ann", 6000, "See you at the cafe tomorrow"),
+    record("Bob", 5000, "the café was closed"),
+    record("Ann", 4000, "Tomorrow, tomorrow!"),
+    record("Cy", 3000, "caffeine first, then the cafe"),
+    record("Bob", 2000, "[Photo]"),
+    record("Cy", 1000, "tomorrow at the cafe?"),
+]
+
+def indices(result):
+    return [hit["index"] for hit in result["hits"]]
+
+def test_parse_query():
+    assert parse_query('hi "Good morning" wor* don\'t "" "solo"') == [
+        ("word", "hi"), ("phrase", ["good", "morning"]), ("prefix", "wor"),
+        ("phrase", ["don", "t"]), ("word", "solo")]
+
+def test_word_search_ranks_repeated_words_first():
+    result = SearchIndex(MESSAGES).search("TOMORROW")
+    assert result["total"] == 3
+    # Two occurrences first, then ties newest first
+    assert indices(result) == [2, 0, 5]
+    assert result["hits"][0]["message"] is MESSAGES[2]
+    assert SearchIndex(MESSAGES).search("nothing")["hits"] == []
+
+def test_every_term_must_match():
+    index = SearchIndex(MESSAGES)
+    assert sorted(indices(index.search("cafe tomorrow"))) == [0, 5]
+    assert indices(index.search("cafe photo")) == []
+
+def test_prefix_search(monkeypatch):
+    index = SearchIndex(MESSAGES)
+    assert sorted(indices(index.search("caf*"))) == [0, 1, 3, 5]
+    assert index.search("caf*")["truncated"] == []
+    monkeypatch.setattr(search_index, "MAX_PREFIX_EXPANSIONS", 2)
+    result = index.search("caf*")
+    assert result["truncated"] == ["caf"]
+    # Only the first words in sorted order are expanded: "cafe" and "caffeine"
+    assert sorted(indices(result)) == [0, 3, 5]
+
+def test_phrase_search_needs_adjacent_words():
+    index = SearchIndex(MESSAGES)
+    assert sorted(indices(index.search('"at the cafe"'))) == [0, 5]
+    assert indices(index.search('"tomorrow the cafe"')) == []
+    assert indices(index.search('"the cafe"')) == [0, 3, 5]
+
+def test_sender_and_date_filters():
+    index = SearchIndex(MESSAGES)
+    assert indices(index.search("cafe", sender="Cy")) == [3, 5]
+    assert indices(index.search("cafe", start=2000)) == [0, 3]
+    assert indices(index.search("cafe", end=3000)) == [3, 5]
+    assert indices(index.search("cafe", sender="Ann", start=1000, end=5000)) == []
+
+def test_pages_past_the_end_return_the_last_page():
+    index = SearchIndex(MESSAGES)
+    pages = [indices(index.search("caf*", page=page, page_size=3)) for page in range(2)]
+    assert sorted(pages[0] + pages[1]) == [0, 1, 3, 5]
+    last = index.search("caf*", page=10, page_size=3)
+    assert last["page"] == 1 and indices(last) == pages[1]
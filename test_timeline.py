@@ -0,0 +1,89 @@
+import statistics
+from datetime import datetime
+
+import pytest
+
+import timeline
+from message_store import MessageStore
+from timeline import analyze_timeline, format_duration
+
+def at(*fields):
+    """Milliseconds of a local date and time."""
+    return int(datetime(*fields).timestamp() * 1000)
+
+# Oldest first here; conversations are newest first, so the tests reverse it
+TIMES = [at(2024, 3, 1, 9, 0), at(2024, 3, 1, 9, 2), at(2024, 3, 1, 23, 50),
+         at(2024, 3, 2, 0, 10), at(2024, 3, 3, 12, 0), at(2024, 3, 10, 8, 0),
+         at(2024, 3, 10, 8, 0, 30), at(2024, 3, 11, 18, 45), at(2024, 4, 5, 7, 15)]
+SENDERS = ["Ann", "Bob", "Bob", "Ann", "Cy", "Ann", "Bob", "Ann", "Cy"]
+
+def messages():
+    return [{"sender_name": sender, "content": "hi", "timestamp": timestamp}
+            for sender, timestamp in zip(SENDERS[::-1], TIMES[::-1])]
+
+def expected_histograms():
+    senders = ["Cy", "Ann", "Bob"]  # first seen, newest first
+    hourly = {sender: [0] * 24 for sender in senders}
+    weekday = {sender: [0] * 7 for sender in senders}
+    for sender, timestamp in zip(SENDERS, TIMES):
+        local = datetime.fromtimestamp(timestamp / 1000)
+        hourly[sender][local.hour] += 1
+        weekday[sender][local.weekday()] += 1
+    return hourly, weekday
+
+@pytest.fixture(params=["python", "numpy"])
+def analysis_path(request, monkeypatch):
+    if request.param == "python":
+        monkeypatch.setattr(timeline, "np", None)
+    elif timeline.np is None:
+        pytest.skip("numpy is not installed")
+    return request.param
+
+def test_histograms(analysis_path):
+    result = analyze_timeline(messages())
+    hourly, weekday = expected_histograms()
+    assert result["senders"] == ["Cy", "Ann", "Bob"]
+    assert result["hourly"] == hourly
+    assert result["weekday"] == weekday
+    assert result["months"] == ["2024-03", "2024-04"]
+    assert result["monthly"] == {"Cy": [1, 1], "Ann": [4, 0], "Bob": [3, 0]}
+
+def test_response_times(analysis_path):
+    responses = analyze_timeline(messages())["response_times"]
+    assert set(responses) == {"Ann", "Bob", "Cy"}
+    ann = [b - a for a, b, previous, sender in zip(TIMES, TIMES[1:], SENDERS, SENDERS[1:])
+           if sender == "Ann" and previous != "Ann"]
+    assert responses["Ann"]["count"] == len(ann) == 3
+    assert responses["Ann"]["median_ms"] == int(statistics.median(ann))
+    # Bob answered after 2 minutes and after 30 seconds
+    assert responses["Bob"] == {"count": 2, "median_ms": 75_000, "buckets": [1, 1, 0, 0, 0, 0, 0]}
+
+def test_streaks_and_gaps(analysis_path):
+    result = analyze_timeline(messages(), gaps=2)
+    assert result["active_days"] == 6
+    assert result["longest_streak"] == {"days": 3, "start": "2024-03-01", "end": "2024-03-03"}
+    assert result["gaps"] == [
+        {"start": TIMES[7], "end": TIMES[8], "milliseconds": TIMES[8] - TIMES[7]},
+        {"start": TIMES[4], "end": TIMES[5], "milliseconds": TIMES[5] - TIMES[4]}]
+
+def test_store_and_unsorted_input_give_the_same_timeline(analysis_path):
+    expected = analyze_timeline(messages())
+    assert analyze_timeline(MessageStore(messages())) == expected
+    # Messages without a timestamp are left out
+    untimed = {"sender_name": "Ann", "content": "hi", "timestamp": 0}
+    assert analyze_timeline(messages() + [untimed]) == expected
+    assert analyze_timeline(MessageStore(messages() + [untimed])) == expected
+    # Out of order, with the senders still first seen in the same order
+    shuffled = messages()
+    shuffled[1:] = shuffled[:0:-1]
+    assert analyze_timeline(shuffled) == expected
+
+def test_empty_timeline():
+    result = analyze_timeline([])
+    assert result["active_days"] == 0 and result["longest_streak"] is None and result["gaps"] == []
+
+def test_format_duration():
+    assert format_duration(59_999) == "59s"
+    assert format_duration(61_000) == "1m 1s"
+    assert format_duration(3_660_000) == "1h 1m"
+    assert format_duration(90_000_000) == "1d 1h"
@@ -0,0 +1,64 @@
+from instagram_message_parser import WordIndex, analyze_messages, make_word_index
+from word_sketch import SketchWordIndex, SpillingWordIndex
+
+def record(sender, timestamp, content):
+    return {"sender_name": sender, "content": content, "timestamp": timestamp}
+
+def skewed_messages(count):
+    """A few frequent words among many that occur once."""
+    return [record(("Ann", "Bob")[i % 2], count - i, f"common{i % 3} common0 rare{i} Rare{i}!")
+            for i in range(count)]
+
+def test_spill_mode_matches_exact_mode(tmp_path):
+    messages = skewed_messages(300)
+    spill = make_word_index("spill", max_entries=8, directory=str(tmp_path))
+    assert analyze_messages(messages, word_index=spill) == analyze_messages(messages)
+
+def test_spilled_indexes_merge_like_exact_ones(tmp_path):
+    messages = skewed_messages(200)
+    exact = WordIndex(messages[:120]).merge(WordIndex(messages[120:]))
+    first, second = (SpillingWordIndex(max_entries=16, directory=str(tmp_path), keep_top=5)
+                     for _ in range(2))
+    for msg in messages[:120]:
+        first.add(msg["sender_name"], msg["content"])
+    for msg in messages[120:]:
+        second.add(msg["sender_name"], msg["content"])
+    first.merge(second)
+    for sender in (None, "Ann", "Bob"):
+        for top_n in (3, 10, None):
+            assert first.most_common(sender, top_n, 6) == exact.most_common(sender, top_n, 6)
+
+def test_sketch_is_exact_while_the_vocabulary_fits():
+    messages = skewed_messages(100)
+    sketch = make_word_index("sketch", capacity=1000)
+    assert analyze_messages(messages, word_index=sketch) == analyze_messages(messages)
+    assert sketch.error_bound() == 0
+
+def check_bounds(sketch, exact, words_counted):
+    for sender in (None, "Ann", "Bob"):
+        bound = sketch.error_bound(sender)
+        assert 0 < bound <= words_counted / sketch.capacity
+        true_counts = dict(exact.most_common(sender, None))
+        estimates = sketch.most_common(sender, 10)
+        for word, count in estimates:
+            assert true_counts[word] <= count <= true_counts[word] + bound
+        # Frequent words are always found, in the right order
+        assert [word for word, _ in estimates[:3]] == [word for word, _ in exact.most_common(sender, 3)]
+
+def test_sketch_counts_are_within_the_error_bound():
+    messages = skewed_messages(2000)
+    sketch = SketchWordIndex(capacity=50)
+    for msg in messages:
+        sketch.add(msg["sender_name"], msg["content"])
+    check_bounds(sketch, WordIndex(messages), 4 * len(messages))
+
+def test_merged_sketches_stay_within_the_error_bound():
+    messages = skewed_messages(2000)
+    first, second = SketchWordIndex(capacity=50), SketchWordIndex(capacity=50)
+    for msg in messages[:700]:
+        first.add(msg["sender_name"], msg["content"])
+    for msg in messages[700:]:
+        second.add(msg["sender_name"], msg["content"])
+    first.merge(second)
+    assert first.senders == {"Ann": 1000, "Bob": 1000}
+    check_bounds(first, WordIndex(messages), 4 * len(messages))
@@ -0,0 +1,255 @@
+import heapq
+import statistics
+from array import array
+from datetime import date, datetime
+
+try:
+    import numpy as np
+except ImportError:  # optional; the pure-Python path gives the same results
+    np = None
+
+# Every UTC offset in use is a multiple of 15 minutes, so all instants in one
+# UTC quarter hour share their local hour, weekday and date. Local fields are
+# looked up once per distinct quarter instead of once per message.
+_QUARTER_MS = 15 * 60 * 1000
+
+WEEKDAYS = ["Monday", "Tuesday", "Wednesday", "Thursday", "Friday", "Saturday", "Sunday"]
+
+# Upper bounds (exclusive) of the response time buckets, in milliseconds
+RESPONSE_BUCKET_BOUNDS = [60_000, 5 * 60_000, 15 * 60_000, 3_600_000, 6 * 3_600_000, 86_400_000]
+RESPONSE_BUCKET_LABELS = ["< 1 min", "1-5 min", "5-15 min", "15-60 min", "1-6 h", "6-24 h", ">= 1 day"]
+
+def _local_fields(quarter):
+    """Return (hour, weekday, month index, day ordinal) of a UTC quarter hour in local time."""
+    dt = datetime.fromtimestamp(quarter * (_QUARTER_MS // 1000))
+    return dt.hour, dt.weekday(), dt.year * 12 + dt.month - 1, dt.toordinal()
+
+def _month_name(month_index):
+    return f"{month_index // 12:04d}-{month_index % 12 + 1:02d}"
+
+def _day_name(ordinal):
+    return date.fromordinal(ordinal).isoformat()
+
+def format_duration(milliseconds):
+    """Format a duration as a short human-readable string like "3h 12m"."""
+    seconds = int(milliseconds) // 1000
+    if seconds < 60:
+        return f"{seconds}s"
+    minutes, seconds = divmod(seconds, 60)
+    if minutes < 60:
+        return f"{minutes}m {seconds}s"
+    hours, minutes = divmod(minutes, 60)
+    if hours < 24:
+        return f"{hours}h {minutes}m"
+    days, hours = divmod(hours, 24)
+    return f"{days}d {hours}h"
+
+class Timeline:
+    """Message timestamps and senders as contiguous arrays, oldest first.
+
+    Timestamps are an int64 array('q') and senders an array('I') of indices
+    into `senders`, so numpy (when installed) can view them without copying.
+    Messages without a timestamp are left out.
+    """
+
+    def __init__(self, timestamps, sender_ids, senders):
+        self.timestamps = timestamps
+        self.sender_ids = sender_ids
+        self.senders = senders
+
+    @classmethod
+    def _sorted(cls, timestamps, sender_ids, senders):
+        # Exports are newest first, so reversed input is usually sorted already
+        if any(timestamps[i] > timestamps[i + 1] for i in range(len(timestamps) - 1)):
+            order = sorted(range(len(timestamps)), key=timestamps.__getitem__)
+            timestamps = array('q', [timestamps[i] for i in order])
+            sender_ids = array('I', [sender_ids[i] for i in order])
+        return cls(timestamps, sender_ids, senders)
+
+    @classmethod
+    def from_messages(cls, messages):
+        """Build a timeline from message dictionaries in any order."""
+        # Senders are numbered in first-seen order, like in a MessageStore
+        ids = {}
+        timestamps = array('q')
+        sender_ids = array('I')
+        for msg in messages:
+            timestamp = msg.get('timestamp', 0)
+            if not timestamp:
+                continue
+            timestamps.append(timestamp)
+            sender_ids.append(ids.setdefault(msg['sender_name'], len(ids)))
+        timestamps.reverse()
+        sender_ids.reverse()
+        return cls._sorted(timestamps, sender_ids, list(ids))
+
+    @classmethod
+    def from_store(cls, store):
+        """Build a timeline from a MessageStore, reusing its columns."""
+        timestamps = array('q', reversed(store.timestamps))
+        sender_ids = array('I', reversed(store.sender_ids))
+        if 0 in timestamps:
+            kept = [i for i, timestamp in enumerate(timestamps) if timestamp]
+            timestamps = array('q', [timestamps[i] for i in kept])
+            sender_ids = array('I', [sender_ids[i] for i in kept])
+        return cls._sorted(timestamps, sender_ids, list(store.senders))
+
+    def __len__(self):
+        return len(self.timestamps)
+
+    def analyze(self, gaps=5):
+        """Compute activity histograms, response times, streaks and gaps.
+
+        Args:
+            gaps: How many of the longest silences between messages to report
+
+        Returns:
+            Dictionary with per-sender "hourly" (24 counts, local time),
+            "weekday" (7 counts, Monday first) and "monthly" counts (one per
+            entry of "months"), per-sender "response_times" ({"count",
+            "median_ms", "buckets"} over RESPONSE_BUCKET_LABELS, measured from
+            the previous message by someone else), the number of
+            "active_days", the "longest_streak" of consecutive active days
+            ({"days", "start", "end"} or None) and the longest "gaps"
+            ({"start", "end", "milliseconds"})
+        """
+        if not self.timestamps:
+            return {
+                "senders": list(self.senders), "hourly": {}, "weekday": {}, "months": [],
+                "monthly": {}, "response_times": {}, "active_days": 0,
+                "longest_streak": None, "gaps": []
+            }
+        if np is not None:
+            result = self._analyze_numpy(gaps)
+        else:
+            result = self._analyze_python(gaps)
+
+        hourly, weekday, first_month, monthly, responses, days, gap_indices = result
+        months = [_month_name(first_month + i) for i in range(len(monthly[0]) if monthly else 0)]
+
+        # Longest run of consecutive active days, earliest first on ties
+        streak_start, streak_length = days[0], 1
+        run_start = days[0]
+        for previous, day in zip(days, days[1:]):
+            if day != previous + 1:
+                run_start = day
+            if day - run_start + 1 > streak_length:
+                streak_start, streak_length = run_start, day - run_start + 1
+
+        timestamps = self.timestamps
+        return {
+            "senders": list(self.senders),
+            "hourly": dict(zip(self.senders, hourly)),
+            "weekday": dict(zip(self.senders, weekday)),
+            "months": months,
+            "monthly": dict(zip(self.senders, monthly)),
+            "response_times": {sender: response for sender, response in zip(self.senders, responses)
+                               if response["count"]},
+            "active_days": len(days),
+            "longest_streak": {
+                "days": streak_length,
+                "start": _day_name(streak_start),
+                "end": _day_name(streak_start + streak_length - 1)
+            },
+            "gaps": [{"start": timestamps[i], "end": timestamps[i + 1],
+                      "milliseconds": timestamps[i + 1] - timestamps[i]} for i in gap_indices]
+        }
+
+    def _analyze_numpy(self, gaps):
+        timestamps = np.frombuffer(self.timestamps, dtype=np.int64)
+        ids = np.frombuffer(self.sender_ids, dtype=np.uint32).astype(np.intp)
+        count = len(self.senders)
+
+        quarters, inverse = np.unique(timestamps // _QUARTER_MS, return_inverse=True)
+        fields = np.array([_local_fields(q) for q in quarters.tolist()], dtype=np.int64)
+        hours, weekdays, months, days = (fields[:, i][inverse] for i in range(4))
+
+        hourly = np.bincount(ids * 24 + hours, minlength=count * 24).reshape(count, 24)
+        weekday = np.bincount(ids * 7 + weekdays, minlength=count * 7).reshape(count, 7)
+        first_month = int(months.min())
+        span = int(months.max()) - first_month + 1
+        monthly = np.bincount(ids * span + (months - first_month),
+                              minlength=count * span).reshape(count, span)
+
+        # A response is a message following one from someone else
+        deltas = np.diff(timestamps)
+        changed = ids[1:] != ids[:-1]
+        response_deltas = deltas[changed]
+        responders = ids[1:][changed]
+        buckets = np.searchsorted(np.array(RESPONSE_BUCKET_BOUNDS), response_deltas, side='right')
+        bucket_counts = np.bincount(responders * len(RESPONSE_BUCKET_LABELS) + buckets,
+                                    minlength=count * len(RESPONSE_BUCKET_LABELS)
+                                    ).reshape(count, len(RESPONSE_BUCKET_LABELS))
+        responses = []
+        for sender_id in range(count):
+            own = response_deltas[responders == sender_id]
+            responses.append({
+                "count": len(own),
+                "median_ms": int(np.median(own)) if len(own) else None,
+                "buckets": bucket_counts[sender_id].tolist()
+            })
+
+        # Longest gaps, ties broken by position like sorted() would
+        gap_indices = []
+        if gaps and len(deltas):
+            threshold = np.partition(deltas, max(0, len(deltas) - gaps))[max(0, len(deltas) - gaps)]
+            candidates = np.nonzero(deltas >= threshold)[0].tolist()
+            gap_indices = sorted(candidates, key=lambda i: -int(deltas[i]))[:gaps]
+
+        return (hourly.tolist(), weekday.tolist(), first_month, monthly.tolist(),
+                responses, np.unique(days).tolist(), gap_indices)
+
+    def _analyze_python(self, gaps):
+        timestamps = self.timestamps
+        ids = self.sender_ids
+        count = len(self.senders)
+
+        local = {}
+        fields = []
+        for timestamp in timestamps:
+            quarter = timestamp // _QUARTER_MS
+            quarter_fields = local.get(quarter)
+            if quarter_fields is None:
+                quarter_fields = local[quarter] = _local_fields(quarter)
+            fields.append(quarter_fields)
+        first_month = min(f[2] for f in local.values())
+        span = max(f[2] for f in local.values()) - first_month + 1
+
+        hourly = [[0] * 24 for _ in range(count)]
+        weekday = [[0] * 7 for _ in range(count)]
+        monthly = [[0] * span for _ in range(count)]
+        for sender_id, (hour, day_of_week, month, _) in zip(ids, fields):
+            hourly[sender_id][hour] += 1
+            weekday[sender_id][day_of_week] += 1
+            monthly[sender_id][month - first_month] += 1
+
+        deltas = [b - a for a, b in zip(timestamps, timestamps[1:])]
+        response_deltas = [[] for _ in range(count)]
+        for i, delta in enumerate(deltas):
+            if ids[i + 1] != ids[i]:
+                response_deltas[ids[i + 1]].append(delta)
+        responses = []
+        for own in response_deltas:
+            buckets = [0] * len(RESPONSE_BUCKET_LABELS)
+            for delta in own:
+                bucket = 0
+                while bucket < len(RESPONSE_BUCKET_BOUNDS) and delta >= RESPONSE_BUCKET_BOUNDS[bucket]:
+                    bucket += 1
+                buckets[bucket] += 1
+            responses.append({
+                "count": len(own),
+                "median_ms": int(statistics.median(own)) if own else None,
+                "buckets": buckets
+            })
+
+        gap_indices = heapq.nlargest(gaps, range(len(deltas)), key=deltas.__getitem__) if gaps else []
+        days = sorted({f[3] for f in local.values()})
+        return hourly, weekday, first_month, monthly, responses, days, gap_indices
+
+def analyze_timeline(messages, gaps=5):
+    """Timeline analytics for a message list or MessageStore; see Timeline.analyze."""
+    if hasattr(messages, 'timestamps'):
+        timeline = Timeline.from_store(messages)
+    else:
+        timeline = Timeline.from_messages(messages)
+    return timeline.analyze(gaps)
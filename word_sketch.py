@@ -0,0 +1,343 @@
+"""Word statistics for exports whose vocabulary doesn't fit in memory.
+
+Both indexes are drop-in replacements for WordIndex (add, senders,
+most_common, merge) and can be handed to MessageAggregator:
+
+SketchWordIndex keeps a Space-Saving top-k sketch per sender and word
+length, so memory is fixed up front and counts are approximate within a
+documented bound. SpillingWordIndex gives exact counts: partial counts are
+written to sorted run files on disk whenever too many distinct words are
+held in memory, and the runs are merged when a query needs them.
+"""
+import heapq
+import os
+import pickle
+import shutil
+import tempfile
+import weakref
+
+from instagram_message_parser import tokenize_words
+
+DEFAULT_SKETCH_CAPACITY = 2000
+DEFAULT_SPILL_ENTRIES = 1_000_000
+DEFAULT_KEEP_TOP = 1000
+
+# Words this long or longer share one sketch/top list; shorter lengths get
+# their own so any min_length query only reads the lengths it needs
+MAX_LENGTH_BUCKET = 16
+
+_RUN_CHUNK = 10_000
+
+def _bucket(word):
+    return min(len(word), MAX_LENGTH_BUCKET)
+
+class SpaceSaving:
+    """Space-Saving heavy-hitter sketch with a fixed number of counters.
+
+    With `capacity` = k counters over a stream of N words, every reported
+    count is at least the word's true count and overestimates it by at most
+    its recorded error, which is never more than N / k. Any word occurring
+    more than N / k times is guaranteed to be in the sketch.
+    """
+
+    def __init__(self, capacity):
+        self.capacity = capacity
+        self.total = 0
+        self.counters = {}  # word -> [count, error, first-seen sequence]
+        self._heap = []     # (count, word), lazily updated; smallest is evicted
+
+    def update(self, word, sequence, count=1):
+        self.total += count
+        counter = self.counters.get(word)
+        if counter is not None:
+            counter[0] += count
+            return
+        if len(self.counters) < self.capacity:
+            self.counters[word] = [count, 0, sequence]
+            heapq.heappush(self._heap, (count, word))
+            return
+        # Replace the smallest counter; the newcomer inherits its count as error
+        minimum, evicted = self._pop_min()
+        self.counters[word] = [minimum + count, minimum, sequence]
+        heapq.heappush(self._heap, (minimum + count, word))
+
+    def _pop_min(self):
+        while True:
+            count, word = heapq.heappop(self._heap)
+            current = self.counters[word][0]
+            if current == count:
+                del self.counters[word]
+                return count, word
+            # Counts only grow, so a stale entry is pushed back with its count
+            heapq.heappush(self._heap, (current, word))
+
+    def min_count(self):
+        """Smallest counter when the sketch is full, else 0 (nothing was evicted)."""
+        if len(self.counters) < self.capacity:
+            return 0
+        return min(counter[0] for counter in self.counters.values())
+
+    def merge(self, other, sequence_offset=0):
+        """Combine with another sketch; error bounds add up like the stream lengths."""
+        own_min, other_min = self.min_count(), other.min_count()
+        merged = {}
+        for word in self.counters.keys() | other.counters.keys():
+            mine = self.counters.get(word)
+            theirs = other.counters.get(word)
+            # A word missing from a full sketch may have occurred up to its minimum count
+            count = (mine[0] if mine else own_min) + (theirs[0] if theirs else other_min)
+            error = (mine[1] if mine else own_min) + (theirs[1] if theirs else other_min)
+            sequence = mine[2] if mine else theirs[2] + sequence_offset
+            merged[word] = [count, error, sequence]
+        kept = heapq.nlargest(self.capacity, merged.items(), key=lambda item: (item[1][0], -item[1][2]))
+        self.counters = dict(kept)
+        self._heap = [(counter[0], word) for word, counter in self.counters.items()]
+        heapq.heapify(self._heap)
+        self.total += other.total
+        return self
+
+class SketchWordIndex:
+    """Approximate word frequencies in fixed memory.
+
+    Keeps one SpaceSaving sketch of `capacity` counters per sender (and one
+    for everyone) per word length, so memory is bounded by about
+    (senders + 1) * MAX_LENGTH_BUCKET * capacity counters however large the
+    vocabulary is. Counts from most_common() are upper bounds; see
+    error_bound() for how far off they can be.
+    """
+
+    def __init__(self, capacity=DEFAULT_SKETCH_CAPACITY):
+        self.capacity = capacity
+        self.senders = {}    # sender -> message count, in first-seen order
+        self._sketches = {}  # sender (None for all) -> {length bucket: SpaceSaving}
+        self._sequence = 0   # words seen so far, for first-appearance ties
+
+    def add(self, sender, content):
+        """Tokenize one message and add its words to the sender and overall sketches."""
+        self.senders[sender] = self.senders.get(sender, 0) + 1
+        if not content:
+            return
+        words = tokenize_words(content)
+        self._count(sender, words)
+        self._count(None, words)
+        self._sequence += len(words)
+
+    def _count(self, key, words):
+        sketches = self._sketches.setdefault(key, {})
+        sequence = self._sequence
+        for word in words:
+            bucket = _bucket(word)
+            sketch = sketches.get(bucket)
+            if sketch is None:
+                sketch = sketches[bucket] = SpaceSaving(self.capacity)
+            sketch.update(word, sequence)
+            sequence += 1
+
+    def merge(self, other):
+        """Add another sketch index's counts, as if its messages came after this one's."""
+        for sender, count in other.senders.items():
+            self.senders[sender] = self.senders.get(sender, 0) + count
+        for key, other_sketches in other._sketches.items():
+            sketches = self._sketches.setdefault(key, {})
+            for bucket, sketch in other_sketches.items():
+                if bucket in sketches:
+                    sketches[bucket].merge(sketch, self._sequence)
+                else:
+                    merged = sketches[bucket] = SpaceSaving(self.capacity)
+                    merged.merge(sketch, self._sequence)
+        self._sequence += other._sequence
+        return self
+
+    def _sketches_for(self, sender, min_length):
+        sketches = self._sketches.get(sender if sender else None, {})
+        return [sketch for bucket, sketch in sketches.items()
+                if bucket >= min(min_length, MAX_LENGTH_BUCKET)]
+
+    def most_common(self, sender=None, top_n=50, min_length=1):
+        """Return the top_n (word, estimated count) pairs for a sender (None for all).
+
+        Ties are ordered by first appearance, like WordIndex.
+        """
+        candidates = [(word, counter[0], counter[2])
+                      for sketch in self._sketches_for(sender, min_length)
+                      for word, counter in sketch.counters.items()
+                      if len(word) >= min_length]
+        rank = lambda item: (-item[1], item[2])
+        ranked = sorted(candidates, key=rank) if top_n is None else heapq.nsmallest(top_n, candidates, key=rank)
+        return [(word, count) for word, count, _ in ranked]
+
+    def error_bound(self, sender=None, min_length=1):
+        """Return the most any count from most_common(sender, ..., min_length) can overestimate.
+
+        This is the largest recorded error among the candidate words, which
+        is at most (words counted in that length's sketch) / capacity.
+        """
+        return max((counter[1]
+                    for sketch in self._sketches_for(sender, min_length)
+                    for word, counter in sketch.counters.items()
+                    if len(word) >= min_length), default=0)
+
+def _write_run(path, entries):
+    """Write sorted (key id, word, count, first seen) tuples to a run file in chunks."""
+    with open(path, 'wb') as file:
+        for start in range(0, len(entries), _RUN_CHUNK):
+            pickle.dump(entries[start:start + _RUN_CHUNK], file, protocol=pickle.HIGHEST_PROTOCOL)
+
+def _read_run(path):
+    with open(path, 'rb') as file:
+        while True:
+            try:
+                chunk = pickle.load(file)
+            except EOFError:
+                return
+            yield from chunk
+
+class SpillingWordIndex:
+    """Exact word frequencies with a bounded number of counts held in memory.
+
+    Counts are kept per (sender or everyone, word) in memory until there are
+    max_entries of them; then they are sorted and written to a run file in a
+    temporary directory (under `directory`, default the system temp dir)
+    and memory is cleared. A query merges the runs with a k-way merge into a
+    single run and keeps the top `keep_top` words per sender and word length,
+    which answers any most_common() call with top_n up to keep_top; larger
+    or unlimited queries stream the merged run. Results match WordIndex
+    exactly, including the order of ties.
+    """
+
+    def __init__(self, max_entries=DEFAULT_SPILL_ENTRIES, directory=None, keep_top=DEFAULT_KEEP_TOP):
+        self.max_entries = max_entries
+        self.keep_top = keep_top
+        self.senders = {}     # sender -> message count, in first-seen order
+        self._keys = {None: 0}  # sender (None for all) -> key id used in runs
+        self._counts = {}     # (key id, word) -> [count, first-seen sequence]
+        self._sequence = 0
+        self._runs = []
+        self._top = None      # key id -> {length bucket: [(word, count, first seen)]}, once merged
+        self._directory = tempfile.mkdtemp(prefix="word_runs_", dir=directory)
+        self._cleanup = weakref.finalize(self, shutil.rmtree, self._directory, True)
+
+    def close(self):
+        """Delete the run files."""
+        self._cleanup()
+
+    def add(self, sender, content):
+        """Tokenize one message and add its words to the sender and overall counts."""
+        self.senders[sender] = self.senders.get(sender, 0) + 1
+        if not content:
+            return
+        key = self._keys.get(sender)
+        if key is None:
+            key = self._keys[sender] = len(self._keys)
+        counts = self._counts
+        sequence = self._sequence
+        for word in tokenize_words(content):
+            for entry_key in (key, 0):
+                counter = counts.get((entry_key, word))
+                if counter is None:
+                    counts[(entry_key, word)] = [1, sequence]
+                else:
+                    counter[0] += 1
+            sequence += 1
+        self._sequence = sequence
+        self._top = None
+        if len(counts) >= self.max_entries:
+            self._spill()
+
+    def _spill(self):
+        entries = sorted((key, word, count, first) for (key, word), (count, first) in self._counts.items())
+        path = os.path.join(self._directory, f"run_{len(self._runs)}.pickle")
+        _write_run(path, entries)
+        self._runs.append(path)
+        self._counts = {}
+
+    def _merged(self):
+        """Yield every (key id, word, count, first seen) total in sorted order."""
+        runs = [_read_run(path) for path in self._runs]
+        runs.append(sorted((key, word, count, first) for (key, word), (count, first) in self._counts.items()))
+        current = None
+        for key, word, count, first in heapq.merge(*runs):
+            if current is not None and current[0] == key and current[1] == word:
+                current[2] += count
+                current[3] = min(current[3], first)
+            else:
+                if current is not None:
+                    yield tuple(current)
+                current = [key, word, count, first]
+        if current is not None:
+            yield tuple(current)
+
+    def _finalize(self):
+        """Merge everything into one run and collect the top words per key and length."""
+        if self._top is not None:
+            return
+        top = {}
+        merged_path = os.path.join(self._directory, f"merged_{len(self._runs)}.pickle")
+        rank = lambda item: (item[1], -item[2])
+        with open(merged_path, 'wb') as file:
+            chunk = []
+            for key, word, count, first in self._merged():
+                chunk.append((key, word, count, first))
+                if len(chunk) >= _RUN_CHUNK:
+                    pickle.dump(chunk, file, protocol=pickle.HIGHEST_PROTOCOL)
+                    chunk = []
+                # Bounded heap of the best keep_top per key and length
+                heap = top.setdefault(key, {}).setdefault(_bucket(word), [])
+                item = (word, count, first)
+                if len(heap) < self.keep_top:
+                    heapq.heappush(heap, (rank(item), item))
+                elif rank(item) > heap[0][0]:
+                    heapq.heapreplace(heap, (rank(item), item))
+            if chunk:
+                pickle.dump(chunk, file, protocol=pickle.HIGHEST_PROTOCOL)
+        for path in self._runs:
+            os.remove(path)
+        self._runs = [merged_path]
+        self._counts = {}
+        self._top = {key: {bucket: [item for _, item in heap] for bucket, heap in buckets.items()}
+                     for key, buckets in top.items()}
+
+    def merge(self, other):
+        """Add another index's counts, as if its messages came after this one's."""
+        for sender, count in other.senders.items():
+            self.senders[sender] = self.senders.get(sender, 0) + count
+        other_keys = {key_id: sender for sender, key_id in other._keys.items()}
+        for key_id, word, count, first in other._merged():
+            sender = other_keys[key_id]
+            key = self._keys.get(sender)
+            if key is None:
+                key = self._keys[sender] = len(self._keys)
+            counter = self._counts.get((key, word))
+            if counter is None:
+                self._counts[(key, word)] = [count, first + self._sequence]
+            else:
+                counter[0] += count
+            if len(self._counts) >= self.max_entries:
+                self._spill()
+        self._sequence += other._sequence
+        self._top = None
+        return self
+
+    def most_common(self, sender=None, top_n=50, min_length=1):
+        """Return the top_n (word, count) pairs for a sender (None for all senders).
+
+        Ties are ordered by first appearance, like WordIndex.
+        """
+        key = self._keys.get(sender if sender else None)
+        if key is None:
+            return []
+        rank = lambda item: (-item[1], item[2])
+        # Words of MAX_LENGTH_BUCKET or more characters share one top list,
+        # so longer min_lengths need the full merged run
+        if top_n is not None and top_n <= self.keep_top and min_length <= MAX_LENGTH_BUCKET:
+            self._finalize()
+            candidates = [item
+                          for bucket, items in self._top.get(key, {}).items()
+                          if bucket >= min(min_length, MAX_LENGTH_BUCKET)
+                          for item in items if len(item[0]) >= min_length]
+            ranked = heapq.nsmallest(top_n, candidates, key=rank)
+        else:
+            candidates = ((word, count, first) for entry_key, word, count, first in self._merged()
+                          if entry_key == key and len(word) >= min_length)
+            ranked = sorted(candidates, key=rank) if top_n is None else heapq.nsmallest(top_n, candidates, key=rank)
+        return [(word, count) for word, count, _ in ranked]